@@ -1,15 +1,20 @@
 import subprocess
 import json
 import logging
+import functools
 from typing import Dict, Optional, Tuple
-from astral import LocationInfo
+from astral import LocationInfo, Observer
 from astral.sun import sun
-from datetime import datetime, timedelta
+from datetime import date as date_type, datetime, timedelta
 import pytz
-import requests
+
+from ..utils.process_utils import HIDDEN_STARTUPINFO, NO_WINDOW_FLAGS
 
 logger = logging.getLogger(__name__)
 
+# Timezone sun times are reported in
+LOCAL_TZ = pytz.timezone('Asia/Singapore')
+
 def get_windows_location() -> Optional[Dict[str, float]]:
     """Get the user's location from various sources."""
     # Try Windows location API first
@@ -29,7 +34,9 @@ def get_windows_location() -> Optional[Dict[str, float]]:
             text=True,
             encoding='ascii',  # Use ASCII encoding
             errors='ignore',   # Ignore any non-ASCII characters
-            check=True
+            check=True,
+            startupinfo=HIDDEN_STARTUPINFO,
+            creationflags=NO_WINDOW_FLAGS
         )
         output = result.stdout.strip()
         if ',' in output:
@@ -39,8 +46,10 @@ def get_windows_location() -> Optional[Dict[str, float]]:
     except Exception as e:
         logger.debug(f"Could not get Windows location: {e}")
 
-    # Try IP geolocation as fallback
+    # Try IP geolocation as fallback; requests is only loaded when this runs
     try:
+        import requests
+        
         # Try ipapi.co first
         response = requests.get('https://ipapi.co/json/', timeout=5)
         data = response.json()
@@ -68,8 +77,13 @@ def get_windows_location() -> Optional[Dict[str, float]]:
     logger.info("Using default location (UTC+0)")
     return {'latitude': 0, 'longitude': 0}
 
+@functools.lru_cache(maxsize=4)
 def get_location_info(lat: float, lon: float, name: str = "") -> LocationInfo:
-    """Create LocationInfo object from coordinates."""
+    """Create LocationInfo object from coordinates.
+    
+    Memoized, so scheduler updates with unchanged coordinates share one instance;
+    callers must not modify the returned object.
+    """
     # Use Asia/Singapore timezone for +8 offset
     return LocationInfo(
         name or f"{lat}, {lon}",
@@ -79,20 +93,25 @@ def get_location_info(lat: float, lon: float, name: str = "") -> LocationInfo:
         lon
     )
 
+@functools.lru_cache(maxsize=8)
+def _sun_times_for_day(day: date_type, latitude: float, longitude: float) -> Tuple[datetime, datetime]:
+    """Compute (sunrise, sunset) for one calendar day; they only change daily, so memoize."""
+    s = sun(Observer(latitude, longitude), date=day, tzinfo=LOCAL_TZ)
+    return s['sunrise'], s['sunset']
+
 def get_sun_times(location: LocationInfo, date: Optional[datetime] = None) -> Dict[str, datetime]:
     """Get sunrise and sunset times for the location."""
     # Use local time for calculations
-    local_tz = pytz.timezone('Asia/Singapore')
+    local_tz = LOCAL_TZ
     date = date or datetime.now(local_tz)
     if date.tzinfo is None:
         date = local_tz.localize(date)
     
     try:
-        s = sun(location.observer, date=date)
-        # Convert times to local timezone
+        sunrise, sunset = _sun_times_for_day(date.astimezone(local_tz).date(), location.latitude, location.longitude)
         return {
-            'sunrise': s['sunrise'].astimezone(local_tz),
-            'sunset': s['sunset'].astimezone(local_tz)
+            'sunrise': sunrise,
+            'sunset': sunset
         }
     except Exception as e:
         logger.error(f"Error getting sun times: {e}")
@@ -103,77 +122,82 @@ def get_sun_times(location: LocationInfo, date: Optional[datetime] = None) -> Di
             'sunset': default_date.replace(hour=18)
         }
 
-def is_near_sunset_or_sunrise(location: LocationInfo, settings: Dict) -> Tuple[bool, str]:
+# Key and result of the last _get_capture_windows() computation
+_windows_cache: Optional[tuple] = None
+
+def _get_capture_windows(location: LocationInfo, now: datetime, time_window: int,
+                         only_sunsets: bool, only_sunrises: bool) -> tuple:
+    """Return today's, yesterday's and tomorrow's sun times plus the capture windows to check.
+    
+    Windows are (start, end, event, description) tuples. The result only changes when
+    the day, location, time window or mode does, so it is reused between ticks.
+    """
+    global _windows_cache
+    key = (now.date(), location.latitude, location.longitude, time_window, only_sunsets, only_sunrises)
+    if _windows_cache is not None and _windows_cache[0] == key:
+        return _windows_cache[1]
+    
+    sun_times = get_sun_times(location, now)
+    # Yesterday's sunset and tomorrow's sunrise cover windows that straddle midnight
+    tomorrow_sun_times = get_sun_times(location, now + timedelta(days=1))
+    yesterday_sun_times = get_sun_times(location, now - timedelta(days=1))
+    
+    window = timedelta(minutes=time_window)
+    events = []
+    # Check sunrise if in sunrise-only mode or both mode
+    if only_sunrises or not only_sunsets:
+        events += [
+            (sun_times['sunrise'], "sunrise", "today's sunrise"),
+            (tomorrow_sun_times['sunrise'], "sunrise", "tomorrow's sunrise"),
+        ]
+    # Check sunset if in sunset-only mode or both mode
+    if only_sunsets or not only_sunrises:
+        events += [
+            (yesterday_sun_times['sunset'], "sunset", "yesterday's sunset"),
+            (sun_times['sunset'], "sunset", "today's sunset"),
+        ]
+    windows = tuple((moment - window, moment + window, event, desc) for moment, event, desc in events)
+    for start, end, _, desc in windows:
+        logger.debug(f"Capture window for {desc}: {start.strftime('%H:%M:%S')} to {end.strftime('%H:%M:%S')}")
+    
+    result = (sun_times, yesterday_sun_times, tomorrow_sun_times, windows)
+    _windows_cache = (key, result)
+    return result
+
+def is_near_sunset_or_sunrise(location: LocationInfo, time_window: int = 30,
+                              only_sunsets: bool = False,
+                              only_sunrises: bool = False) -> Tuple[bool, str]:
     """Check if current time is near sunset or sunrise.
     
     Args:
         location: LocationInfo object containing location details
-        settings: Settings object containing all program settings
+        time_window: Minutes before/after sunset/sunrise to capture
+        only_sunsets: Only check sunset windows
+        only_sunrises: Only check sunrise windows
     """
-    time_window = settings.get('time_window', 30)
-    only_sunsets = settings.get('only_sunsets', False)
-    only_sunrises = settings.get('only_sunrises', False)
-
     # Validate settings - if both are True, treat as "both" mode
     if only_sunsets and only_sunrises:
         logger.warning("Both only_sunsets and only_sunrises are True - defaulting to checking both")
         only_sunsets = False
         only_sunrises = False
     
-    local_tz = pytz.timezone('Asia/Singapore')
-    now = datetime.now(local_tz)
+    now = datetime.now(LOCAL_TZ)
+    sun_times, yesterday_sun_times, tomorrow_sun_times, windows = _get_capture_windows(
+        location, now, time_window, only_sunsets, only_sunrises)
     
-    # Get today's sun times
-    sun_times = get_sun_times(location)
-    
-    # Get tomorrow's sun times if we're near midnight
-    tomorrow_sun_times = get_sun_times(location, now + timedelta(days=1))
-    
-    # Get yesterday's sun times if we're near midnight
-    yesterday_sun_times = get_sun_times(location, now - timedelta(days=1))
-    
-    window = timedelta(minutes=time_window)
     logger.info("------------- Self-Checking Schedule: ------------")
     logger.info(f"Sunset:  {yesterday_sun_times['sunset'].strftime('%d.%m.%Y %H:%M:%S (%Z)')}")
     logger.info(f"Sunrise: {sun_times['sunrise'].strftime('%d.%m.%Y %H:%M:%S (%Z)')}")
     logger.info(f"Sunset:  {sun_times['sunset'].strftime('%d.%m.%Y %H:%M:%S (%Z)')}")
     logger.info(f"Sunrise: {tomorrow_sun_times['sunrise'].strftime('%d.%m.%Y %H:%M:%S (%Z)')}")
     logger.info(f"---------------- Current Settings: ----------------")
-    logger.info(f"Capture interval: {settings.get('interval', 60)} seconds | Schedule enabled: {settings.get('schedule_enabled', False)}")
-    logger.info(f"Time window:      {time_window} minutes | Resolution: {settings.get('resolution', '1080p')}")
+    logger.info(f"Time window:      {time_window} minutes")
     logger.info(f"Mode: {'Sunset only' if only_sunsets else 'Sunrise only' if only_sunrises else 'Sunrise & Sunset'}")
     
-    # Check sunrise if in sunrise-only mode or both mode
-    if only_sunrises or (not only_sunsets and not only_sunrises):
-        sunrise_windows = [
-            (sun_times['sunrise'], "today's sunrise"),
-            (tomorrow_sun_times['sunrise'], "tomorrow's sunrise"),
-        ]
-        
-        for sunrise_time, desc in sunrise_windows:
-            sunrise_start = sunrise_time - window
-            sunrise_end = sunrise_time + window
-            logger.debug(f"Checking {desc} window: {sunrise_start.strftime('%H:%M:%S')} to {sunrise_end.strftime('%H:%M:%S')}")
-            
-            if sunrise_start <= now <= sunrise_end:
-                logger.info(f"Within {desc} window")
-                return True, "sunrise"
-    
-    # Check sunset if in sunset-only mode or both mode
-    if only_sunsets or (not only_sunsets and not only_sunrises):
-        sunset_windows = [
-            (yesterday_sun_times['sunset'], "yesterday's sunset"),
-            (sun_times['sunset'], "today's sunset"),
-        ]
-        
-        for sunset_time, desc in sunset_windows:
-            sunset_start = sunset_time - window
-            sunset_end = sunset_time + window
-            logger.debug(f"Checking {desc} window: {sunset_start.strftime('%H:%M:%S')} to {sunset_end.strftime('%H:%M:%S')}")
-            
-            if sunset_start <= now <= sunset_end:
-                logger.info(f"Within {desc} window")
-                return True, "sunset"
+    for start, end, event, desc in windows:
+        if start <= now <= end:
+            logger.info(f"Within {desc} window")
+            return True, event
     
     logger.debug("Not within any capture windows")
     return False, ""
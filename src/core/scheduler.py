@@ -26,6 +26,11 @@ class Scheduler:
         self._schedule_enabled = self._settings.get('schedule_enabled', False)
         self._was_in_window = False  # track previous state
         self._current_event_type = ""  # track which event we are capturing
+        self._app = None  # owning App, provides stream_manager/capture_screenshot
+
+    def set_app(self, app) -> None:
+        """Attach the application whose streams this scheduler manages."""
+        self._app = app
 
     def start(self, callback: Callable,
              interval: Optional[int] = None,
@@ -112,7 +117,9 @@ class Scheduler:
             
         should_capture, event = is_near_sunset_or_sunrise(
             self._location,
-            self._settings
+            self._time_window,
+            self._only_sunsets,
+            self._only_sunrises
         )
         
         if should_capture:
@@ -144,6 +151,9 @@ class Scheduler:
             logger.debug("Scheduler is paused, not starting or killing processes.")
             return
 
+        if self._app is None:
+            raise RuntimeError("Scheduler has no app attached; call set_app() before start()")
+
         if self._schedule_enabled:
             if not self._location:
                 logger.warning("Scheduling is enabled but no location set. Defaulting to always run processes.")
@@ -188,8 +198,12 @@ class Scheduler:
         Returns a tuple (is_in_window, event_type)
         where event_type is 'sunrise'/'sunset' or ''.
         """
-        from .location import is_near_sunset_or_sunrise
-        return is_near_sunset_or_sunrise(self._location, self._settings.all)
+        return is_near_sunset_or_sunrise(
+            self._location,
+            self._time_window,
+            self._only_sunsets,
+            self._only_sunrises
+        )
 
     def _start_processes_for_all_urls(self, event_type: str, force: bool = False):
         """
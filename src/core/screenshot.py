@@ -1,157 +1,245 @@
 import os
-import cv2
-import yt_dlp
+import re
+import functools
 import logging
 import subprocess
 import threading
-import multiprocessing as mp
-from queue import Empty
-from time import sleep, time
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple, Any
+from collections import OrderedDict, deque
+from time import monotonic
+from datetime import datetime
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Any
 import concurrent.futures
 
+from ..utils.process_utils import HIDDEN_STARTUPINFO, NO_WINDOW_FLAGS
+
+if TYPE_CHECKING:
+    import yt_dlp
+
 # Get module logger
 logger = logging.getLogger(__name__)
 
+# Upper bound on prefetch worker threads
+MAX_PREFETCH_WORKERS = 8
+# Longest interval served by a continuously decoding ffmpeg pipe; longer intervals
+# reconnect for each screenshot instead of decoding the stream between shots
+PIPE_MAX_INTERVAL = 60
+# Concurrent yt_dlp extractions; more than a handful triggers YouTube throttling (HTTP 429)
+_YDL_SEM = threading.BoundedSemaphore(4)
+
+# Date/time suffix that live stream titles carry, e.g. "My Cam 2025-02-07 06:00"
+_TITLE_DATE_RE = re.compile(r'\s\d{4}-\d{2}-\d{2}[\s\S]*$')
+
+# Characters not allowed in Windows filenames
+_INVALID_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# Read-only yt_dlp options, built once. Only the format list is needed;
+# skip DASH manifests, comments and subtitles
+YDL_OPTS = MappingProxyType({
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'youtube_include_dash_manifest': False,
+    'youtube_include_hls_manifest': True,
+    'getcomments': False,
+    'writesubtitles': False,
+    'writeautomaticsub': False
+})
+
 class StreamInfoCache:
     """Cache for stream information to reduce API calls."""
-    def __init__(self, cache_duration: int = 10800):  # 3 hours in seconds
-        self._cache = {}
-        self._cache_duration = timedelta(seconds=cache_duration)
+    def __init__(self, cache_duration: int = 10800, max_size: int = 256):  # 3 hours in seconds
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._ttl = float(cache_duration)
+        self._max_size = max_size
+        self._lock = threading.Lock()
 
     def get(self, url: str) -> Optional[Dict[str, Any]]:
         """Get cached stream info if not expired."""
-        if url in self._cache:
-            info, timestamp = self._cache[url]
-            if datetime.now() - timestamp < self._cache_duration:
-                return info
-            del self._cache[url]
+        with self._lock:
+            entry = self._cache.get(url)
+        if entry is None:
+            return None
+        info, expiry = entry
+        if monotonic() < expiry:
+            with self._lock:
+                if url in self._cache:
+                    self._cache.move_to_end(url)
+            return info
+        with self._lock:
+            # Only evict if no fresher entry was stored meanwhile
+            if self._cache.get(url) is entry:
+                del self._cache[url]
         return None
 
     def set(self, url: str, info: Dict[str, Any]) -> None:
         """Cache stream information."""
-        self._cache[url] = (info, datetime.now())
+        expiry = monotonic() + self._ttl
+        with self._lock:
+            self._cache[url] = (info, expiry)
+            self._cache.move_to_end(url)
+            # Evict least recently used entries
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, url: str) -> None:
+        """Remove a single entry, e.g. when its stream URL has expired."""
+        with self._lock:
+            self._cache.pop(url, None)
 
     def clear(self) -> None:
         """Clear the cache."""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
 
 class ScreenshotCapture:
     def __init__(self):
         """Initialize screenshot capture with caching."""
         self.stream_cache = StreamInfoCache()
-        self.ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': True
-        }
-        self._prefetch_thread = None
+        self.ydl_opts = YDL_OPTS
+        # Persistent pool reused across prefetch calls, created on first use
+        self._prefetch_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # One reused YoutubeDL per thread: an instance keeps per-call state and is not
+        # thread-safe. _YDL_SEM only bounds how many extractions run at once
+        self._ydl_local = threading.local()
+        self._ydl_instances: List['yt_dlp.YoutubeDL'] = []
+        self._ydl_lock = threading.Lock()
+
+    def cached_stream_info(self, url: str, preferred_resolution: str) -> Optional[Dict[str, Any]]:
+        """Return cached stream info for url if it was resolved for preferred_resolution."""
+        info = self.stream_cache.get(url)
+        if info is not None and info['preferred_resolution'] == preferred_resolution:
+            return info
+        return None
 
     def get_stream_info(self, url: str, preferred_resolution: str = '1080p') -> Dict[str, Any]:
         """Get stream information, using cache if available."""
-        # Check cache first
-        cached_info = self.stream_cache.get(url)
+        # Check cache first; an entry for another resolution counts as a miss
+        cached_info = self.cached_stream_info(url, preferred_resolution)
         if cached_info:
             return cached_info
 
         # Get fresh info
         try:
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                logger.info(f"Fetching fresh info from YouTube for {url}")
-                info = ydl.extract_info(url, download=False)
-                formats = info.get('formats', [])
-                best_format = self._get_best_matching_format(formats, preferred_resolution)
-                
-                # Get raw title and remove date/time part
-                raw_title = info.get('title', 'Untitled')
-                logger.debug(f"Raw YouTube title: {raw_title}")
-                if ' 2025-' in raw_title:
-                    raw_title = raw_title.split(' 2025-')[0].strip()
-                    logger.debug(f"Cleaned YouTube title: {raw_title}")
-                
-                result = {
-                    'url': best_format['url'],
-                    'resolution': f"{best_format.get('height', 0)}p",
-                    'preferred_resolution': preferred_resolution,
-                    'title': raw_title,
-                    'format_id': best_format['format_id']
-                }
-                
-                # Cache the result
-                self.stream_cache.set(url, result)
-                return result
+            logger.info(f"Fetching fresh info from YouTube for {url}")
+            with _YDL_SEM:
+                info = self._get_ydl().extract_info(url, download=False)
+            formats = info.get('formats', [])
+            best_format = self._get_best_matching_format(formats, preferred_resolution)
+            
+            # Get raw title and remove date/time part
+            raw_title = info.get('title', 'Untitled')
+            logger.debug("Raw YouTube title: %s", raw_title)
+            cleaned_title = _TITLE_DATE_RE.sub('', raw_title).strip()
+            if cleaned_title != raw_title:
+                raw_title = cleaned_title
+                logger.debug("Cleaned YouTube title: %s", raw_title)
+            
+            result = {
+                'url': best_format['url'],
+                'resolution': f"{best_format.get('height', 0)}p",
+                'preferred_resolution': preferred_resolution,
+                'title': raw_title,
+                'format_id': best_format['format_id']
+            }
+            
+            # Cache the result
+            self.stream_cache.set(url, result)
+            return result
         except Exception as e:
             logger.error(f"Error getting stream info: {e}")
             raise
 
+    def _get_ydl(self) -> 'yt_dlp.YoutubeDL':
+        """Return the calling thread's YoutubeDL, created on its first lookup."""
+        ydl = getattr(self._ydl_local, 'ydl', None)
+        if ydl is None:
+            # Imported lazily: yt_dlp is heavy and only needed on a cache miss
+            import yt_dlp
+            # YoutubeDL may write to its params, so it gets its own copy
+            ydl = self._ydl_local.ydl = yt_dlp.YoutubeDL(dict(self.ydl_opts))
+            with self._ydl_lock:
+                self._ydl_instances.append(ydl)
+        return ydl
+
     def _get_best_matching_format(self, formats: list, preferred: str) -> Dict[str, Any]:
         """Find the best matching format for the preferred resolution."""
         target_height = int(preferred.rstrip('p'))
-        formats = [f for f in formats if f.get('height')]
         
-        if not formats:
+        # Single pass over formats with a height, without building a filtered list:
+        # closest to target, then the taller one, then the larger file
+        best = min(
+            ((abs(height - target_height), -height, -(f.get('filesize') or 0), i, f)
+             for i, f in enumerate(formats)
+             if (height := f.get('height'))),
+            default=None
+        )
+        if best is None:
             raise ValueError("No valid formats found")
-            
-        # Sort by height and prefer formats closer to target
-        formats.sort(key=lambda x: abs(x['height'] - target_height))
-        selected_format = formats[0]
-
-        return selected_format
+        return best[-1]
+
+    def _stream_dir(self, stream_info: Dict[str, Any], output_path: str, event_type: str, now: datetime) -> str:
+        """Return the folder for a stream's captures on the day of `now`."""
+        # Build a folder name including date + event type + stream title
+        # e.g. "2025_02_07_Sunrise_MyStreamTitle"
+        folder_name = f"{now.year:04d}_{now.month:02d}_{now.day:02d}"
+        if event_type:
+            # uppercase first letter
+            folder_name += f"_{event_type.capitalize()}"
+        folder_name += f"_{self._clean_filename(stream_info['title'])}"
+        return os.path.join(output_path, folder_name)
+
+    def _build_output_path(self, stream_info: Dict[str, Any], output_path: str, event_type: str = "") -> str:
+        """Build the timestamped output file path, creating its folder if needed."""
+        now = datetime.now()
+        stream_path = self._stream_dir(stream_info, output_path, event_type, now)
+        os.makedirs(stream_path, exist_ok=True)
+        return stream_path + os.sep + _timestamp_filename(now)
+
+    def _prepare_capture(self, stream_info: Dict[str, Any], output_path: str, event_type: str = "") -> Tuple[str, list]:
+        """Build the output file path and ffmpeg command for a single capture."""
+        full_path = self._build_output_path(stream_info, output_path, event_type)
+
+        # ffmpeg invocation: small probe, no audio/subtitles, single decode thread
+        cmd = [
+            'ffmpeg',
+            '-y',
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-rw_timeout', '10000000',  # microseconds
+            '-probesize', '1M',
+            '-analyzeduration', '1M',
+            '-fflags', 'nobuffer',
+            '-i', stream_info['url'],
+            '-frames:v', '1',
+            '-an',
+            '-sn',
+            '-threads', '1',
+            '-q:v', '2',
+            full_path
+        ]
+        return full_path, cmd
 
     def capture_screenshot(self, stream_info: Dict[str, Any], output_path: str, event_type: str = "") -> Optional[str]:
         """Capture a screenshot from the stream."""
         try:
-            # Generate output filename with timestamp
-            now = datetime.now()
-            timestamp = now.strftime('%Y-%m-%d_%H-%M-%S')
-
-            # Clean the title
-            clean_title = self._clean_filename(stream_info['title'])
-
-            # Build a folder name including date + event type + stream title
-            date_str = now.strftime('%Y_%m_%d')
-            # e.g. "2025_02_07_Sunrise_MyStreamTitle"
-            folder_name = f"{date_str}"
-            if event_type:
-                # uppercase first letter
-                folder_name += f"_{event_type.capitalize()}"
-            folder_name += f"_{clean_title}"
-
-            stream_path = os.path.join(output_path, folder_name)
-            os.makedirs(stream_path, exist_ok=True)
-
-            filename = f"{timestamp}.jpg"
-            full_path = os.path.join(stream_path, filename)
-
-            # ffmpeg invocation
-            cmd = [
-                'ffmpeg',
-                '-y',
-                '-i', stream_info['url'],
-                '-vframes', '1',
-                '-q:v', '2',
-                full_path
-            ]
-            
-            # Use CREATE_NO_WINDOW flag
-            startupinfo = None
-            if os.name == 'nt':  # Windows
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-
-            # Run ffmpeg and capture error output
+            full_path, cmd = self._prepare_capture(stream_info, output_path, event_type)
+
+            # ffmpeg runs with -loglevel error, so stderr only carries failures
             process = subprocess.run(
                 cmd,
-                startupinfo=startupinfo,
-                capture_output=True,
+                startupinfo=HIDDEN_STARTUPINFO,
+                creationflags=NO_WINDOW_FLAGS,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                bufsize=1 << 20,
                 text=True
             )
             
             if process.returncode != 0:
-                logger.error(f"ffmpeg error output: {process.stderr}")
-                raise Exception(f"ffmpeg failed: {process.stderr}")
+                if process.stderr:
+                    logger.error(f"ffmpeg error output: {process.stderr}")
+                raise Exception(f"ffmpeg failed with exit code {process.returncode}")
 
             return full_path
             
@@ -159,140 +247,351 @@ class ScreenshotCapture:
             logger.error(f"Error capturing screenshot: {e}")
             return None
 
-    def _clean_filename(self, filename: str) -> str:
-        """Clean a string to be used as a filename."""
-        # Replace invalid characters
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
-        
-        # Remove any non-ASCII characters
-        filename = ''.join(char for char in filename if ord(char) < 128)
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _clean_filename(filename: str) -> str:
+        """Clean a string to be used as a filename.
+
+        Memoized, since a stream's title is fixed for the life of its capture loop.
+        """
+        # Replace invalid characters and drop any non-ASCII characters
+        filename = filename.translate(_INVALID_TRANS).encode('ascii', 'ignore').decode('ascii')
         
         # Limit filename length (Windows max path is 260, leave room for path)
         name, ext = os.path.splitext(filename)
         if len(filename) > 200:  # Leave room for path
-            name = name[:196]  # Leave room for extension
-            filename = name + ext
+            filename = name[:196] + ext  # Leave room for extension
         
         return filename.strip()
 
-    def prefetch_stream_info(self, urls: list[str], preferred_resolution: str = '1080p') -> None:
-        """Prefetch stream information for multiple URLs in parallel."""
-        def _fetch_single_url(url: str):
-            try:
-                if not self.stream_cache.get(url):  # Only fetch if not in cache
-                    logger.debug(f"Cache miss for {url}, fetching stream info")
-                    info = self.get_stream_info(url, preferred_resolution)
-                    logger.debug(f"Successfully prefetched stream info for {url} (Resolution: {info.get('resolution', 'unknown')})")
-            except Exception as e:
-                logger.error(f"Error prefetching stream info for {url}: {e}")
+    def _prefetch_single_url(self, url: str, preferred_resolution: str) -> None:
+        """Fetch stream info for one URL unless it is already cached."""
+        try:
+            if not self.cached_stream_info(url, preferred_resolution):  # Only fetch if not in cache
+                logger.debug("Cache miss for %s, fetching stream info", url)
+                info = self.get_stream_info(url, preferred_resolution)
+                logger.debug("Successfully prefetched stream info for %s (Resolution: %s)",
+                             url, info.get('resolution', 'unknown'))
+        except Exception as e:
+            logger.error(f"Error prefetching stream info for {url}: {e}")
+
+    def prefetch_stream_info(self, urls: list[str], preferred_resolution: str = '1080p') -> List[concurrent.futures.Future]:
+        """Prefetch stream information for multiple URLs in parallel.
 
+        Work is submitted to the shared prefetch pool; the returned futures can
+        be awaited by callers that need the results.
+        """
         # For single URLs, process directly without thread overhead
         if len(urls) == 1:
-            logger.debug(f"Processing single URL without thread overhead: {urls[0]}")
-            _fetch_single_url(urls[0])
-            return
+            logger.debug("Processing single URL without thread overhead: %s", urls[0])
+            self._prefetch_single_url(urls[0], preferred_resolution)
+            return []
+
+        if self._prefetch_pool is None:
+            self._prefetch_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_PREFETCH_WORKERS,
+                thread_name_prefix='prefetch'
+            )
 
-        # Cancel any existing prefetch for multiple URLs
-        if self._prefetch_thread and self._prefetch_thread.is_alive():
-            logger.debug("Cancelling existing prefetch thread")
-            self._prefetch_thread = None
+        logger.debug("Submitting stream info prefetch for %d URLs", len(urls))
+        return [
+            self._prefetch_pool.submit(self._prefetch_single_url, url, preferred_resolution)
+            for url in urls
+        ]
+
+    def shutdown(self) -> None:
+        """Stop accepting prefetch work, drop queued lookups and release yt_dlp."""
+        if self._prefetch_pool is not None:
+            self._prefetch_pool.shutdown(wait=False, cancel_futures=True)
+            self._prefetch_pool = None
+        with self._ydl_lock:
+            instances, self._ydl_instances = self._ydl_instances, []
+        for ydl in instances:
+            ydl.close()
+
+    def start_frame_pipe(self, stream_url: str, interval: int) -> subprocess.Popen:
+        """Start a long-lived ffmpeg that emits one MJPEG frame every `interval` seconds on stdout."""
+        cmd = [
+            'ffmpeg',
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-i', stream_url,
+            '-vf', f'fps=1/{interval}',
+            '-q:v', '2',
+            '-f', 'image2pipe',
+            '-vcodec', 'mjpeg',
+            '-'
+        ]
+        return subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,  # Drained by StreamProcess so failures can be logged
+            stdin=subprocess.DEVNULL,
+            startupinfo=HIDDEN_STARTUPINFO,
+            creationflags=NO_WINDOW_FLAGS,
+            bufsize=1 << 20
+        )
 
-        def _prefetch():
-            logger.debug(f"Starting parallel stream info prefetch for {len(urls)} URLs")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(urls), 50)) as executor:
-                logger.debug(f"Created thread pool with {min(len(urls), 50)} workers")
-                executor.map(_fetch_single_url, urls)
-            logger.debug("Stream info prefetch completed")
+def extract_frames_stream(stdout, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield complete JPEG images from an MJPEG byte stream.
 
-        # Start new prefetch thread for multiple URLs
-        self._prefetch_thread = threading.Thread(target=_prefetch, daemon=True)
-        self._prefetch_thread.start()
-        logger.debug("Started prefetch thread")
+    Frames are split on the SOI (FF D8) and EOI (FF D9) markers.
+    """
+    buffer = bytearray()
+    while True:
+        chunk = stdout.read1(chunk_size) if hasattr(stdout, 'read1') else stdout.read(chunk_size)
+        if not chunk:
+            return
+        buffer += chunk
+        while True:
+            start = buffer.find(b'\xff\xd8')
+            if start < 0:
+                # Keep a possible partial marker at the tail
+                del buffer[:-1]
+                break
+            end = buffer.find(b'\xff\xd9', start + 2)
+            if end < 0:
+                if start:
+                    del buffer[:start]
+                break
+            yield bytes(buffer[start:end + 2])
+            del buffer[:end + 2]
+
+def _timestamp_filename(now: datetime) -> str:
+    """Screenshot file name for `now`, e.g. "2025-02-07_06-30-00.jpg" (avoids strftime)."""
+    return (f"{now.year:04d}-{now.month:02d}-{now.day:02d}_"
+            f"{now.hour:02d}-{now.minute:02d}-{now.second:02d}.jpg")
+
+def _write_frame(path: str, frame: bytes) -> None:
+    """Write JPEG bytes to `path`, recreating its folder if it was removed."""
+    try:
+        f = open(path, 'wb')
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, 'wb')
+    with f:
+        f.write(frame)
 
 class StreamProcess:
     def __init__(self, url: str, output_path: str, interval: int, 
-                 resolution: str = '1080p', event_type: str = ""):
+                 resolution: str = '1080p', event_type: str = "",
+                 screenshot_capture: Optional[ScreenshotCapture] = None,
+                 stream_info: Optional[Dict[str, Any]] = None):
         self.url = url
         self.output_path = output_path
         self.interval = interval
         self.resolution = resolution
         self.event_type = event_type  # store it here
-        self.process = None
-        self.stop_event = None
-        self.screenshot_capture = ScreenshotCapture()
-        # Create a pause event that is shared with the child process.
-        self.pause_event = mp.Event()
+        self.thread: Optional[threading.Thread] = None
+        self._pipe: Optional[subprocess.Popen] = None
+        self._interval_changed = threading.Event()
+        self.stop_event: Optional[threading.Event] = None
+        # Shared with the manager so stream info fetched once is reused by every stream
+        self.screenshot_capture = screenshot_capture or ScreenshotCapture()
+        self._initial_stream_info = stream_info
+        # Create a pause event that is checked by the capture thread.
+        self.pause_event = threading.Event()
         self.pause_event.set()  # Initially running (not paused)
 
     def pause(self):
-        # Clear the event: any call to wait() in the child will now block.
+        # Clear the event: any call to wait() in the capture thread will now block.
         self.pause_event.clear()
 
     def resume(self):
         # Set the event: any blocked wait() calls will return immediately.
         self.pause_event.set()
 
-    def _capture_loop(self, stop_event: mp.Event):
-        """Continuous capture loop running in its own process."""
+    def set_interval(self, interval: int) -> None:
+        """Change the capture interval without restarting the thread.
+
+        The frame rate is baked into the ffmpeg pipe, so the running pipe is
+        terminated and the loop reopens it with the new interval.
+        """
+        if interval == self.interval:
+            return
+        self.interval = interval
+        self._interval_changed.set()
+        pipe = self._pipe
+        if pipe is not None and pipe.poll() is None:
+            pipe.terminate()
+
+    def _capture_loop(self):
+        """Continuous capture loop running in its own thread.
+
+        Up to PIPE_MAX_INTERVAL, a single ffmpeg per stream keeps the connection
+        open and emits one frame per interval; frames are split from its stdout
+        and written to disk. Longer intervals run one short ffmpeg per screenshot,
+        so the stream isn't decoded for minutes between shots.
+        """
         logger.info(f"Starting capture loop for {self.url}")
+        stop_event = self.stop_event
         try:
-            # Get initial stream info
-            stream_info = self.screenshot_capture.get_stream_info(self.url, self.resolution)
-            logger.info(f"Got stream info for {self.url}")
+            # Use stream info resolved by the manager, if any
+            stream_info = self._initial_stream_info
+            if stream_info is None:
+                stream_info = self.screenshot_capture.get_stream_info(self.url, self.resolution)
+                logger.info(f"Got stream info for {self.url}")
+
+            # Folder for the current day; recomputed only when the date changes
+            stream_dir = None
+            stream_dir_date = None
+            # Consecutive pipe runs or screenshots that failed to deliver a frame
+            failures = 0
 
             while not stop_event.is_set():
-                # Wait here until the process is resumed. If the pause event is cleared,
-                # this will block until resume() is called.
-                self.pause_event.wait()
-
-                start_time = time()
-                try:
-                    # Take screenshot directly in this process.
-                    screenshot_path = self.screenshot_capture.capture_screenshot(stream_info, self.output_path)
+                # Wait here until the stream is resumed, still honoring a stop while paused.
+                while not self.pause_event.wait(timeout=0.25):
+                    if stop_event.is_set():
+                        return
+
+                if self.interval > PIPE_MAX_INTERVAL:
+                    # Long interval: one short ffmpeg per screenshot
+                    self._interval_changed.clear()
+                    shot_started = monotonic()
+                    screenshot_path = self.screenshot_capture.capture_screenshot(
+                        stream_info, self.output_path, self.event_type)
                     if screenshot_path:
-                        logger.info(f"Screenshot saved: {screenshot_path}")
-                except Exception as e:
-                    logger.error(f"Error taking screenshot for {self.url}: {e}")
-
-                # Calculate sleep time for the next capture
-                elapsed = time() - start_time
-                sleep_time = max(0, self.interval - elapsed)
-                logger.debug(f"Capture took {elapsed:.2f}s, sleeping for {sleep_time:.2f}s")
-
-                # Sleep in small increments so the process can respond quickly to a pause command.
-                # Alternatively, you can simply call sleep(sleep_time) if quick responsiveness isn’t critical.
-                sleep(sleep_time)
+                        failures = 0
+                        logger.info("Screenshot saved: %s", screenshot_path)
+                        wait = self.interval - (monotonic() - shot_started)
+                    else:
+                        failures += 1
+                        stream_info = self._refresh_stream_info(stream_info)
+                        wait = min(self.interval, 2 ** failures)
+                    if self._wait_next_shot(wait):
+                        break
+                    continue
+
+                self._interval_changed.clear()
+                pipe = self.screenshot_capture.start_frame_pipe(stream_info['url'], self.interval)
+                self._pipe = pipe
+                # Keep the tail of ffmpeg's (error-level) output to log if the pipe fails
+                stderr_tail = deque(maxlen=20)
+                stderr_reader = threading.Thread(target=stderr_tail.extend, args=(pipe.stderr,), daemon=True)
+                stderr_reader.start()
+                if self._interval_changed.is_set():
+                    # set_interval ran before the pipe was published and could not stop it;
+                    # end it now so the loop restarts with the new interval
+                    pipe.terminate()
+                # Terminate ffmpeg as soon as a stop is requested, even while blocked on a read
+                watcher = threading.Thread(target=self._terminate_on_stop, args=(stop_event, pipe), daemon=True)
+                watcher.start()
+                got_frame = False
+                try:
+                    for frame in extract_frames_stream(pipe.stdout):
+                        got_frame = True
+                        if stop_event.is_set():
+                            break
+                        if not self.pause_event.is_set():
+                            # Keep draining the pipe while paused so frames stay current
+                            continue
+                        try:
+                            now = datetime.now()
+                            if now.date() != stream_dir_date:
+                                stream_dir = self.screenshot_capture._stream_dir(
+                                    stream_info, self.output_path, self.event_type, now)
+                                stream_dir_date = now.date()
+                            screenshot_path = stream_dir + os.sep + _timestamp_filename(now)
+                            _write_frame(screenshot_path, frame)
+                            logger.info("Screenshot saved: %s", screenshot_path)
+                        except Exception as e:
+                            logger.error(f"Error taking screenshot for {self.url}: {e}")
+                finally:
+                    if pipe.poll() is None:
+                        pipe.terminate()
+                    pipe.wait()
+                    pipe.stdout.close()
+                    self._pipe = None
+                    stderr_reader.join(timeout=1)
+                    pipe.stderr.close()
+                    if pipe.returncode and stderr_tail and not stop_event.is_set():
+                        output = b''.join(stderr_tail).decode('utf-8', 'replace').strip()
+                        logger.warning(f"ffmpeg pipe for {self.url} reported: {output}")
+
+                if self._interval_changed.is_set():
+                    logger.info(f"Restarting ffmpeg pipe for {self.url} with {self.interval}s interval")
+                    continue
+
+                if stop_event.is_set():
+                    break
+
+                # googlevideo URLs expire after a few hours, after which ffmpeg exits
+                # with an HTTP 403; fetch a fresh URL instead of retrying the stale one.
+                failures = 0 if got_frame else failures + 1
+                logger.warning(f"ffmpeg pipe for {self.url} ended (exit code {pipe.returncode}), refreshing stream info")
+                stream_info = self._refresh_stream_info(stream_info)
+                # Back off while the stream keeps failing (e.g. it went offline)
+                if stop_event.wait(min(60, 2 ** failures)):
+                    break
 
         except Exception as e:
             logger.error(f"Error in capture loop for {self.url}: {e}")
 
+    def _refresh_stream_info(self, stream_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop the cached stream info and fetch it again, keeping the old info on failure."""
+        self.screenshot_capture.stream_cache.invalidate(self.url)
+        try:
+            return self.screenshot_capture.get_stream_info(self.url, self.resolution)
+        except Exception as e:
+            logger.error(f"Could not refresh stream info for {self.url}: {e}")
+            return stream_info
+
+    def _wait_next_shot(self, timeout: float) -> bool:
+        """Sleep until the next per-shot capture; True if a stop was requested.
+
+        Returns early when the interval changes so the new one applies right away.
+        """
+        deadline = monotonic() + timeout
+        while (remaining := deadline - monotonic()) > 0:
+            if self.stop_event.wait(min(0.5, remaining)):
+                return True
+            if self._interval_changed.is_set():
+                break
+        return self.stop_event.is_set()
+
+    @staticmethod
+    def _terminate_on_stop(stop_event: threading.Event, pipe: subprocess.Popen) -> None:
+        """Terminate the ffmpeg pipe once stop is requested or it exits on its own."""
+        while not stop_event.wait(0.5):
+            if pipe.poll() is not None:
+                return
+        if pipe.poll() is None:
+            pipe.terminate()
+
     def start(self):
-        """Start the stream capture process."""
-        self.stop_event = mp.Event()
-        self.process = mp.Process(
+        """Start the stream capture thread."""
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
             target=self._capture_loop,
-            args=(self.stop_event,),
-            daemon=False
+            name=f"capture-{self.url}",
+            daemon=True
         )
-        self.process.start()
-        logger.info(f"Started capture process for {self.url}")
+        self.thread.start()
+        logger.info(f"Started capture thread for {self.url}")
 
-    def stop(self):
+    def request_stop(self):
+        """Signal the capture thread to stop without waiting for it."""
         if self.stop_event:
             self.stop_event.set()
-        if self.process:
-            self.process.join(timeout=1)
-            if self.process.is_alive():
-                self.process.terminate()
-            self.process = None
-        logger.info(f"Stopped capture process for {self.url}")
+
+    def stop(self):
+        self.request_stop()
+        if self.thread:
+            # The watcher terminates ffmpeg on stop, which unblocks the loop
+            self.thread.join(timeout=2)
+            if self.thread.is_alive():
+                logger.warning(f"Capture thread for {self.url} did not exit in time")
+            self.thread = None
+        logger.info(f"Stopped capture thread for {self.url}")
 
 class StreamManager:
     """Manages multiple stream capture processes."""
-    def __init__(self):
+    def __init__(self, screenshot_capture: Optional[ScreenshotCapture] = None):
         self.streams: Dict[str, StreamProcess] = {}
+        # Guards changes to streams; held only for dict operations, never while stopping a stream
+        self._lock = threading.Lock()
+        # One capture helper (and stream info cache) shared by all streams
+        self._shared_capture = screenshot_capture or ScreenshotCapture()
 
     def add_stream(self, url: str, output_path: str, interval: int,
                resolution: str = '1080p', paused: bool = False, event_type: str = ""):
@@ -300,8 +599,15 @@ class StreamManager:
         if url in self.streams:
             self.remove_stream(url)
 
-        stream_process = StreamProcess(url, output_path, interval, resolution, event_type=event_type)
-        self.streams[url] = stream_process
+        # Hand down already-resolved stream info; otherwise the stream fetches it itself
+        stream_process = StreamProcess(
+            url, output_path, interval, resolution,
+            event_type=event_type,
+            screenshot_capture=self._shared_capture,
+            stream_info=self._shared_capture.cached_stream_info(url, resolution)
+        )
+        with self._lock:
+            self.streams[url] = stream_process
 
         stream_process.start()
 
@@ -310,27 +616,41 @@ class StreamManager:
 
     def remove_stream(self, url: str):
         """Stop and remove a stream capture process."""
-        if url in self.streams:
-            self.streams[url].stop()  # calls StreamProcess.stop()
-            del self.streams[url]
+        with self._lock:
+            stream = self.streams.pop(url, None)
+        if stream is not None:
+            stream.stop()  # calls StreamProcess.stop()
+
+    def remove_streams(self, urls) -> None:
+        """Stop and remove several streams, waiting for them together rather than one by one."""
+        with self._lock:
+            streams = [self.streams.pop(url) for url in urls if url in self.streams]
+        # Signal every thread first so their shutdowns overlap; the joins then take
+        # about as long as the slowest stream instead of the sum of all of them
+        for stream in streams:
+            stream.request_stop()
+        for stream in streams:
+            stream.stop()
+
+    def snapshot(self) -> Tuple[StreamProcess, ...]:
+        """Return the current streams; safe to iterate while streams are added or removed."""
+        with self._lock:
+            return tuple(self.streams.values())
+
+    def iter_processes(self) -> Iterator[subprocess.Popen]:
+        """Yield the ffmpeg pipe of every stream that currently has one running."""
+        for stream in self.snapshot():
+            pipe = stream._pipe
+            if pipe is not None and pipe.poll() is None:
+                yield pipe
 
     def update_interval(self, interval: int):
-        """Update interval for all streams."""
-        urls = list(self.streams.keys())
-        for url in urls:
-            stream = self.streams[url]
-            output_path = stream.output_path
-            resolution = stream.resolution
-            self.remove_stream(url)
-            self.add_stream(url, output_path, interval, resolution)
+        """Update interval for all streams in place."""
+        for stream in self.snapshot():
+            stream.set_interval(interval)
 
     def stop_all(self):
         """Stop all stream capture processes in parallel."""
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            # Start stopping all streams in parallel
-            futures = [
-                executor.submit(self.remove_stream, url)
-                for url in list(self.streams.keys())
-            ]
-            # Wait for all to complete
-            concurrent.futures.wait(futures)
+        with self._lock:
+            urls = list(self.streams)
+        self.remove_streams(urls)
@@ -1,7 +1,11 @@
 import json
 import os
 import logging
-from typing import Dict, Any
+import threading
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, Any, Optional
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -10,27 +14,95 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 CONFIG_PATH = os.path.join(PROJECT_ROOT, 'config.json')
 
-DEFAULT_SETTINGS = {
-    'youtube_urls': [],  # List of YouTube URLs to capture
+# Read-only template; use default_settings() for a mutable copy
+DEFAULT_SETTINGS = MappingProxyType({
+    'youtube_urls': (),  # List of YouTube URLs to capture
     'output_path': 'screenshots',
     'interval': 60,  # seconds
     'resolution': '1080p',
-    'location': {
+    'location': MappingProxyType({
         'latitude': 0,
         'longitude': 0,
         'name': ''
-    },
+    }),
     'schedule_enabled': False,
     'time_window': 30,  # minutes
     'only_sunsets': False,
     'only_sunrises': False,
     'fps': "60"
+})
+
+def _thaw(value: Any) -> Any:
+    """Recursively copy a frozen template value into plain dicts/lists."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+def default_settings() -> Dict[str, Any]:
+    """Return a fresh, fully independent copy of the default settings."""
+    return _thaw(DEFAULT_SETTINGS)
+
+# Legacy interval strings (as stored by older versions) mapped to seconds
+_INTERVAL_MAP = {
+    '1 second': 1,
+    '2 seconds': 2,
+    '3 seconds': 3,
+    '4 seconds': 4,
+    '5 seconds': 5,
+    '10 seconds': 10,
+    '15 seconds': 15,
+    '30 seconds': 30,
+    '45 seconds': 45,
+    '1 minute': 60,
+    '1:15 minute': 75,
+    '1:30 minute': 90,
+    '1:45 minute': 105,
+    '2 minutes': 120,
+    '3 minutes': 180,
+    '4 minutes': 240,
+    '5 minutes': 300,
+    '6 minutes': 360,
+    '7 minutes': 420,
+    '8 minutes': 480,
+    '9 minutes': 540,
+    '10 minutes': 600,
+    '15 minutes': 900,
+    '30 minutes': 1800
 }
 
+# Settings stored as whole numbers, with the name used in error messages
+_INT_SETTINGS = {'interval': 'interval', 'time_window': 'time window'}
+
+def _coerce(key: str, value: Any) -> Any:
+    """Return value as an int for integer settings, falling back to the default."""
+    if key in _INT_SETTINGS and not isinstance(value, int):
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            logger.error(f"Invalid {_INT_SETTINGS[key]} value: {value}, using default")
+            return DEFAULT_SETTINGS[key]
+    return value
+
+# Delay before pending changes are written, so bursts of set() calls share one write
+SAVE_DELAY = 0.5
+# Longest a change may stay unwritten while set() calls keep restarting the delay
+SAVE_MAX_DELAY = 5.0
+
 class Settings:
     def __init__(self, config_file: str = CONFIG_PATH):
         """Initialize settings manager."""
         self.config_file = config_file
+        self._dirty = False
+        self._dirty_since = 0.0
+        # Bumped on every change, so a write only clears _dirty if nothing changed meanwhile
+        self._version = 0
+        self._save_timer: Optional[threading.Timer] = None
+        # Guards the settings dict and the dirty state
+        self._save_lock = threading.Lock()
+        # Serializes file writes between the debounce timer and flush()
+        self._write_lock = threading.Lock()
         self._settings = self.load()
 
     def load(self) -> Dict[str, Any]:
@@ -42,121 +114,114 @@ class Settings:
                 
                 # Convert interval if it's a string
                 if 'interval' in settings and isinstance(settings['interval'], str):
-                    # Map common interval strings to seconds
-                    interval_map = {
-                        '1 second': 1,
-                        '2 seconds': 2,
-                        '3 seconds': 3,
-                        '4 seconds': 4,
-                        '5 seconds': 5,
-                        '10 seconds': 10,
-                        '15 seconds': 15,
-                        '30 seconds': 30,
-                        '45 seconds': 45,
-                        '1 minute': 60,
-                        '1:15 minute': 75,
-                        '1:30 minute': 90,
-                        '1:45 minute': 105,
-                        '2 minutes': 120,
-                        '3 minutes': 180,
-                        '4 minutes': 240,
-                        '5 minutes': 300,
-                        '6 minutes': 360,
-                        '7 minutes': 420,
-                        '8 minutes': 480,
-                        '9 minutes': 540,
-                        '10 minutes': 600,
-                        '15 minutes': 900,
-                        '30 minutes': 1800
-                    }
-                    settings['interval'] = interval_map.get(settings['interval'], DEFAULT_SETTINGS['interval'])
+                    # Map legacy interval strings to seconds
+                    settings['interval'] = _INTERVAL_MAP.get(settings['interval'], DEFAULT_SETTINGS['interval'])
                 
                 # Handle legacy preferred_resolution setting
                 if 'preferred_resolution' in settings:
                     settings['resolution'] = settings.pop('preferred_resolution')
                 
+                # Coerce once here so get() never has to
+                for key in _INT_SETTINGS:
+                    if key in settings:
+                        settings[key] = _coerce(key, settings[key])
+                
                 # Ensure all default settings exist
-                for key, value in DEFAULT_SETTINGS.items():
-                    if key not in settings:
-                        settings[key] = value
-                return settings
+                return {**default_settings(), **settings}
             except Exception as e:
                 logger.error(f"Error loading settings: {e}")
-                return DEFAULT_SETTINGS.copy()
-        return DEFAULT_SETTINGS.copy()
+                return default_settings()
+        return default_settings()
 
     def save(self) -> None:
-        """Save current settings to file."""
-        try:
-            # Convert any non-JSON-serializable values
-            settings_to_save = {}
-            for key, value in self._settings.items():
-                if isinstance(value, (str, int, float, bool, list, dict)) or value is None:
-                    settings_to_save[key] = value
-                else:
-                    # Convert other types to string representation
-                    settings_to_save[key] = str(value)
-            
-            with open(self.config_file, 'w') as f:
-                json.dump(settings_to_save, f, indent=4)
-        except Exception as e:
-            logger.error(f"Error saving settings: {e}")
+        """Mark settings dirty and schedule a debounced write."""
+        with self._save_lock:
+            now = time.monotonic()
+            self._version += 1
+            if not self._dirty:
+                self._dirty = True
+                self._dirty_since = now
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            delay = min(SAVE_DELAY, max(0.0, self._dirty_since + SAVE_MAX_DELAY - now))
+            self._save_timer = threading.Timer(delay, self._write_now)
+            self._save_timer.daemon = True
+            self._save_timer.start()
 
-    def get(self, key: str, default: Any = None) -> Any:
-        """Get a setting value."""
-        value = self._settings.get(key, default)
-        
-        # Ensure numeric values for interval and time_window
-        if key == 'interval' and not isinstance(value, int):
-            try:
-                value = int(value)
-                self._settings[key] = value  # Update stored value
-                self.save()
-            except (ValueError, TypeError):
-                logger.error(f"Invalid interval value: {value}, using default")
-                value = DEFAULT_SETTINGS['interval']
-        elif key == 'time_window' and not isinstance(value, int):
+    def flush(self) -> None:
+        """Write pending changes immediately."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self._write_now()
+
+    def _write_now(self) -> None:
+        """Atomically write current settings to file if they changed.
+
+        Settings stay dirty if the write fails, so the next save or flush retries it.
+        """
+        with self._write_lock:
+            with self._save_lock:
+                if not self._dirty:
+                    return
+                self._save_timer = None
+                version = self._version
+                # Copy under the lock so setters on other threads can't change it mid-write
+                snapshot = dict(self._settings)
             try:
-                value = int(value)
-                self._settings[key] = value  # Update stored value
-                self.save()
-            except (ValueError, TypeError):
-                logger.error(f"Invalid time window value: {value}, using default")
-                value = DEFAULT_SETTINGS['time_window']
+                # Convert any non-JSON-serializable values
+                settings_to_save = {}
+                for key, value in snapshot.items():
+                    if isinstance(value, (str, int, float, bool, list, dict)) or value is None:
+                        settings_to_save[key] = value
+                    else:
+                        # Convert other types to string representation
+                        settings_to_save[key] = str(value)
                 
-        return value
+                # Write to a temp file and swap it in so a crash never leaves a partial config
+                tmp_path = self.config_file + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(settings_to_save, f, indent=4)
+                os.replace(tmp_path, self.config_file)
+            except Exception as e:
+                logger.error(f"Error saving settings: {e}")
+                return
+            with self._save_lock:
+                if self._version == version:
+                    self._dirty = False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a setting value from the in-memory snapshot."""
+        return self._settings.get(key, default)
 
     def set(self, key: str, value: Any) -> None:
         """Set a setting value."""
-        # Convert interval and time_window to integers
-        if key == 'interval' and not isinstance(value, int):
-            try:
-                value = int(value)
-            except (ValueError, TypeError):
-                logger.error(f"Invalid interval value: {value}, using default")
-                value = DEFAULT_SETTINGS['interval']
-        elif key == 'time_window' and not isinstance(value, int):
-            try:
-                value = int(value)
-            except (ValueError, TypeError):
-                logger.error(f"Invalid time window value: {value}, using default")
-                value = DEFAULT_SETTINGS['time_window']
-
-        self._settings[key] = value
+        value = _coerce(key, value)
+        with self._save_lock:
+            self._settings[key] = value
         self.save()
 
     def update(self, settings: Dict[str, Any]) -> None:
         """Update multiple settings at once."""
         # Convert any non-JSON-serializable values
-        for key, value in settings.items():
-            if isinstance(value, (str, int, float, bool, list, dict)) or value is None:
-                self._settings[key] = value
-            else:
-                # Convert other types to string representation
-                self._settings[key] = str(value)
+        converted = {
+            key: _coerce(key, value)
+            if isinstance(value, (str, int, float, bool, list, dict)) or value is None
+            else str(value)  # Convert other types to string representation
+            for key, value in settings.items()
+        }
+        with self._save_lock:
+            self._settings.update(converted)
         self.save()
 
     @property
     def all(self) -> Dict[str, Any]:
         """Get all settings."""
-        return self._settings.copy()
+        with self._save_lock:
+            return self._settings.copy()
+
+    @property
+    def view(self) -> Mapping[str, Any]:
+        """Read-only live view of all settings, without copying them."""
+        return MappingProxyType(self._settings)
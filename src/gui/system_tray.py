@@ -1,151 +1,381 @@
 import logging
 import pystray
-from PIL import Image, ImageDraw
-from typing import Dict, Any, Optional, Callable
+from PIL import Image
+from typing import Dict, Any, Optional, Callable, Set, Tuple
 import tkinter as tk
 from tkinter import filedialog
 import os
-from pathlib import Path
+import shutil
 import subprocess
-import os
+import collections
+import re
 import threading
+import functools
+import concurrent.futures
+import base64
+import zlib
+from ..utils.process_utils import HIDDEN_STARTUPINFO, NO_WINDOW_FLAGS
 from .location_dialog import LocationDialog
-from .url_dialog import URLDialog
+from .url_dialog import URLDialog, shutdown_validation
 
 logger = logging.getLogger(__name__)
 
+# Menu choices: (label, value)
+INTERVALS = (
+    ("1 second", 1),
+    ("2 seconds", 2),
+    ("3 seconds", 3),
+    ("4 seconds", 4),
+    ("5 seconds", 5),
+    ("10 seconds", 10),
+    ("15 seconds", 15),
+    ("30 seconds", 30),
+    ("45 seconds", 45),
+    ("1 minute", 60),
+    ("1:15 minute", 75),
+    ("1:30 minute", 90),
+    ("1:45 minute", 105),
+    ("2 minutes", 120),
+    ("3 minutes", 180),
+    ("4 minutes", 240),
+    ("5 minutes", 300),
+    ("6 minutes", 360),
+    ("7 minutes", 420),
+    ("8 minutes", 480),
+    ("9 minutes", 540),
+    ("10 minutes", 600),
+    ("15 minutes", 900),
+    ("30 minutes", 1800)
+)
+
+TIME_WINDOWS = (
+    ('15 minutes', 15),
+    ('30 minutes', 30),
+    ('45 minutes', 45),
+    ('60 minutes', 60),
+    ('90 minutes', 90),
+    ('120 minutes', 120)
+)
+
+RESOLUTIONS = ('2160p', '1440p', '1080p', '720p', '480p', '360p')
+
+# Label -> value lookups used by the shared menu dispatchers
+_INTERVAL_BY_LABEL = dict(INTERVALS)
+_TIME_WINDOW_BY_LABEL = dict(TIME_WINDOWS)
+_CAPTURE_MODE_BY_LABEL = {
+    "Sunrise and Sunset": 'both',
+    "Only Sunrise": 'sunrise',
+    "Only Sunset": 'sunset',
+}
+_CALLBACK_BY_LABEL = {
+    "Enable Scheduling": 'toggle_schedule',
+    "Shutdown when done": 'toggle_shutdown_when_done',
+    "Pause": 'toggle_pause',
+    "Quit": 'quit',
+}
+_INTERVAL_LABELS = {value: label for label, value in INTERVALS}
+_TIME_WINDOW_LABELS = {value: label for label, value in TIME_WINDOWS}
+_CAPTURE_MODE_LABELS = {mode: label for label, mode in _CAPTURE_MODE_BY_LABEL.items()}
+
+# FFmpeg threads per clip encode; clips are encoded cpu_count // ENCODE_THREADS at a time
+ENCODE_THREADS = 2
+
+# libx264 settings for clips; a fast preset costs little quality on still frames
+SOFTWARE_ENCODER_ARGS = ('-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'stillimage', '-crf', '23')
+
+# Hardware H.264 encoders preferred over libx264, in order, with their fastest settings.
+# Each gets a constant-quality target close to libx264's -crf 23; without one they
+# fall back to low default bitrates
+HARDWARE_ENCODER_ARGS = (
+    ('-c:v', 'h264_nvenc', '-preset', 'p1', '-rc', 'vbr', '-cq', '23', '-b:v', '0'),
+    ('-c:v', 'h264_videotoolbox', '-q:v', '60'),
+    ('-c:v', 'h264_qsv', '-preset', 'veryfast', '-global_quality', '23'),
+    ('-c:v', 'h264_amf', '-quality', 'speed', '-rc', 'cqp', '-qp_i', '23', '-qp_p', '23'),
+)
+
+# Seconds to wait for further settings changes before refreshing the menu
+MENU_REFRESH_DELAY = 0.05
+
+# Fallback camera icon: 64x64 RGB pixels (white camera body, lens and
+# viewfinder on black), zlib-compressed and base64-encoded
+_FALLBACK_ICON_DATA = (
+    'eNrt1zESgCAMAEH+/2ktLC10gADJ7NYSr2AQWwMAAJK5XvTr1z997Bb69etf2b9gWkT/3rGD'
+    'L/pcOGVyUP//JSPDg/qXPR/RP7glDunvPlX060+9/7OfPwXO/wLf3wL3nwL3T/8v+vWf0w8A'
+    'AACPGwqORWQ='
+)
+
+# Decoded tray icons, loaded on first use and shared afterwards
+_ICON_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'icon.png')
+_ICON_CACHE: Optional[Image.Image] = None
+_FALLBACK_ICON_CACHE: Optional[Image.Image] = None
+
+def _get_icon() -> Image.Image:
+    """Load and decode the tray icon from the assets folder once."""
+    global _ICON_CACHE
+    if _ICON_CACHE is None:
+        # Decode now and close the file; the pixel data stays in memory
+        with Image.open(_ICON_PATH) as image:
+            image.load()
+        _ICON_CACHE = image
+    return _ICON_CACHE
+
+def _probe_encoder_args() -> tuple:
+    """Pick the first hardware H.264 encoder this FFmpeg build offers, else libx264."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            startupinfo=HIDDEN_STARTUPINFO,
+            creationflags=NO_WINDOW_FLAGS
+        )
+    except OSError as e:
+        logger.warning(f"Could not list FFmpeg encoders: {e}")
+        return SOFTWARE_ENCODER_ARGS
+    available = set(re.findall(r'^\s*V\S*\s+(\S+)', result.stdout, re.MULTILINE))
+    for encoder_args in HARDWARE_ENCODER_ARGS:
+        if encoder_args[1] in available:
+            logger.info(f"Using hardware encoder {encoder_args[1]} for clips")
+            return encoder_args
+    return SOFTWARE_ENCODER_ARGS
+
 class SystemTray:
+    # Clip encoder arguments shared by all instances; see _get_encoder_args
+    _encoder_args: Optional[tuple] = None
+
     def __init__(self, settings: Dict[str, Any], callbacks: Dict[str, Callable]):
         """Initialize system tray icon."""
         self.settings = settings
         self.callbacks = callbacks
+        # Resolve hot-path callbacks once instead of looking them up on every click
+        self._callback_by_label = {
+            label: callbacks[name] for label, name in _CALLBACK_BY_LABEL.items() if name in callbacks
+        }
+        self._set_interval = callbacks['set_interval']
+        self._set_time_window = callbacks['set_time_window']
+        self._toggle_capture_mode = callbacks['toggle_capture_mode']
+        self._set_resolution = callbacks['set_resolution']
         self.icon = None
+        # Set once by stop()/close(), which may both run during quit
+        self._closing = False
+        self._close_lock = threading.Lock()
         self._paused = False
         self._converting = False  # Track if clip conversion is in progress
-        self._conversion_process = None  # Store the conversion process
+        self._conversion_processes: Set[subprocess.Popen] = set()  # Running FFmpeg encodes
+        self._conversion_lock = threading.Lock()
+        self._conversion_futures: Dict[concurrent.futures.Future, str] = {}  # Pending clip encodes
+        # Pending debounced menu refresh scheduled by update_settings
+        self._pending_update: Optional[threading.Timer] = None
+        self._update_lock = threading.Lock()
+        # Built once; checked/enabled callbacks read current state on each paint
+        self._menu: Optional[pystray.Menu] = None
+        # Submenu items are built lazily; their checked state is read on each paint
+        self._interval_submenu: Optional[tuple] = None
+        self._resolution_submenu: Optional[tuple] = None
+        self._time_window_submenu: Optional[tuple] = None
+        self._tk_root: Optional[tk.Tk] = None  # hidden parent for file dialogs
+        # Single thread that owns the Tk root (Tk objects must stay on one thread)
+        self._dialog_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._normalize_settings()
+        self._sync_current_values()
+
+    def _normalize_settings(self) -> None:
+        """Coerce numeric settings once when they are written rather than on every read."""
+        for key in ('interval', 'time_window'):
+            if key in self.settings:
+                self.settings[key] = int(self.settings[key])
+
+    def _sync_current_values(self) -> None:
+        """Cache the label of each radio group's active item so menu paints are a plain == test."""
+        self._active_interval = _INTERVAL_LABELS.get(self.settings.get('interval', 60))
+        self._active_resolution = self.settings.get('resolution', '1080p')
+        self._active_time_window = _TIME_WINDOW_LABELS.get(self.settings.get('time_window', 30))
+        only_sunsets = bool(self.settings.get('only_sunsets', False))
+        only_sunrises = bool(self.settings.get('only_sunrises', False))
+        if only_sunsets and not only_sunrises:
+            mode = 'sunset'
+        elif only_sunrises and not only_sunsets:
+            mode = 'sunrise'
+        elif not only_sunsets and not only_sunrises:
+            mode = 'both'
+        else:
+            mode = None
+        self._active_capture_mode = _CAPTURE_MODE_LABELS.get(mode)
         
     def create_icon(self) -> Image:
         """Load the icon from assets folder."""
-        # Get the path to the icon file
-        src_dir = Path(__file__).parent.parent
-        icon_path = os.path.join(src_dir, 'assets', 'icon.png')
-        
         try:
-            # Open and return the icon image
-            return Image.open(icon_path)
+            return _get_icon()
         except Exception as e:
-            logger.error(f"Failed to load icon from {icon_path}: {e}")
+            logger.error(f"Failed to load icon: {e}")
             # Fall back to creating a basic icon if loading fails
             return self._create_fallback_icon()
             
     def _create_fallback_icon(self) -> Image:
-        """Create a basic camera icon as fallback."""
-        # Create a new image with a black background
-        width = 64
-        height = 64
-        image = Image.new('RGB', (width, height), 'black')
-        dc = ImageDraw.Draw(image)
-        
-        # Draw camera body
-        dc.rectangle((10, 20, 54, 44), fill='white')
-        
-        # Draw lens
-        dc.ellipse((22, 25, 42, 39), fill='black')
-        dc.ellipse((24, 27, 40, 37), fill='white')
+        """Create a basic camera icon as fallback (decoded once, then reused)."""
+        global _FALLBACK_ICON_CACHE
+        if _FALLBACK_ICON_CACHE is None:
+            raw = zlib.decompress(base64.b64decode(_FALLBACK_ICON_DATA))
+            _FALLBACK_ICON_CACHE = Image.frombytes('RGB', (64, 64), raw)
+        return _FALLBACK_ICON_CACHE
         
-        # Draw viewfinder
-        dc.rectangle((45, 15, 50, 20), fill='white')
-        
-        return image
-        
-    def create_menu(self) -> pystray.Menu:
-        """Create the system tray menu."""
-        def get_interval_menu():
-            def create_interval_item(text: str, interval_value: int):
-                def set_interval(icon, item):
-                    self.callbacks['set_interval'](interval_value)
-                return pystray.MenuItem(
-                    text,
-                    set_interval,
-                    checked=lambda item: int(self.settings.get('interval', 60)) == interval_value,
-                    radio=True
-                )
-            
-            intervals = [
-                ("1 second", 1),
-                ("2 seconds", 2),
-                ("3 seconds", 3),
-                ("4 seconds", 4),
-                ("5 seconds", 5),
-                ("10 seconds", 10),
-                ("15 seconds", 15),
-                ("30 seconds", 30),
-                ("45 seconds", 45),
-                ("1 minute", 60),
-                ("1:15 minute", 75),
-                ("1:30 minute", 90),
-                ("1:45 minute", 105),
-                ("2 minutes", 120),
-                ("3 minutes", 180),
-                ("4 minutes", 240),
-                ("5 minutes", 300),
-                ("6 minutes", 360),
-                ("7 minutes", 420),
-                ("8 minutes", 480),
-                ("9 minutes", 540),
-                ("10 minutes", 600),
-                ("15 minutes", 900),
-                ("30 minutes", 1800)
-            ]
-            return pystray.Menu(*[create_interval_item(text, interval) for text, interval in intervals])
-
-        def get_resolution_menu():
-            def create_resolution_item(res: str):
-                def check_resolution(item):
-                    return self.settings.get('resolution', '1080p') == res
-                    
-                def set_resolution(icon, item):
-                    self._handle_resolution_change(res)
-                    
-                return pystray.MenuItem(
-                    res,
-                    set_resolution,
-                    checked=check_resolution,
-                    radio=True
-                )
-            
-            resolutions = ['2160p', '1440p', '1080p', '720p', '480p', '360p']
-            return pystray.Menu(*[create_resolution_item(res) for res in resolutions])
-
-        def get_time_window_menu():
-            def create_time_window_item(text: str, minutes_value: int):
-                def set_time_window(icon, item):
-                    self.callbacks['set_time_window'](minutes_value)
-                return pystray.MenuItem(
-                    text,
-                    set_time_window,
-                    checked=lambda item: int(self.settings.get('time_window', 30)) == minutes_value,
-                    radio=True
-                )
-            
-            time_windows = [
-                ('15 minutes', 15),
-                ('30 minutes', 30),
-                ('45 minutes', 45),
-                ('60 minutes', 60),
-                ('90 minutes', 90),
-                ('120 minutes', 120)
-            ]
-            return pystray.Menu(*[create_time_window_item(text, minutes) for text, minutes in time_windows])
+    def _on_callback_click(self, icon, item) -> None:
+        self._callback_by_label[item.text]()
+
+    def _is_setting_enabled(self, key: str, item) -> bool:
+        return bool(self.settings.get(key, False))
+
+    def _is_paused(self, item) -> bool:
+        return self._paused
+
+    def _can_convert(self, item) -> bool:
+        return not self._converting
+
+    def _open_url_dialog(self, icon, item) -> None:
+        URLDialog(
+            settings=self.callbacks['get_current_settings'](),
+            on_save=self.callbacks['set_youtube_url'],
+            on_validated=self.callbacks.get('url_validated')
+        ).run()
+
+    def _open_location_dialog(self, icon, item) -> None:
+        LocationDialog(
+            settings=self.callbacks['get_current_settings'](),
+            on_save=self.callbacks['set_location']
+        ).run()
+
+    def _on_interval_click(self, icon, item) -> None:
+        self._set_interval(_INTERVAL_BY_LABEL[item.text])
+
+    def _is_interval_checked(self, item) -> bool:
+        return item.text == self._active_interval
+
+    def _on_resolution_click(self, icon, item) -> None:
+        self._handle_resolution_change(item.text)
+
+    def _is_resolution_checked(self, item) -> bool:
+        return item.text == self._active_resolution
+
+    def _on_time_window_click(self, icon, item) -> None:
+        self._set_time_window(_TIME_WINDOW_BY_LABEL[item.text])
 
-        def select_output_path(_):
-            root = tk.Tk()
-            root.withdraw()  # Hide the main window
-            path = filedialog.askdirectory()
-            root.destroy()
+    def _is_time_window_checked(self, item) -> bool:
+        return item.text == self._active_time_window
+
+    def _on_capture_mode_click(self, icon, item) -> None:
+        self._toggle_capture_mode(_CAPTURE_MODE_BY_LABEL[item.text])
+
+    def _is_capture_mode_checked(self, item) -> bool:
+        return item.text == self._active_capture_mode
+
+    def _interval_items(self) -> tuple:
+        """Interval submenu items, built on first popup and reused afterwards."""
+        if self._interval_submenu is None:
+            self._interval_submenu = tuple(
+                pystray.MenuItem(text, self._on_interval_click, checked=self._is_interval_checked, radio=True)
+                for text, _ in INTERVALS
+            )
+        return self._interval_submenu
+
+    def _resolution_items(self) -> tuple:
+        """Resolution submenu items, built on first popup and reused afterwards."""
+        if self._resolution_submenu is None:
+            self._resolution_submenu = tuple(
+                pystray.MenuItem(res, self._on_resolution_click, checked=self._is_resolution_checked, radio=True)
+                for res in RESOLUTIONS
+            )
+        return self._resolution_submenu
+
+    def _time_window_items(self) -> tuple:
+        """Time window submenu items, built on first popup and reused afterwards."""
+        if self._time_window_submenu is None:
+            self._time_window_submenu = tuple(
+                pystray.MenuItem(text, self._on_time_window_click, checked=self._is_time_window_checked, radio=True)
+                for text, _ in TIME_WINDOWS
+            )
+        return self._time_window_submenu
+
+    def _select_output_path(self, icon=None, item=None) -> None:
+        """Open the output path dialog on the dialog thread so the tray stays responsive."""
+        self._get_dialog_executor().submit(self._ask_output_path)
+
+    def _get_dialog_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Return the dialog thread, starting it again if close() shut it down."""
+        if self._dialog_executor is None:
+            self._dialog_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix='tray-dialog'
+            )
+        return self._dialog_executor
+
+    def _ask_output_path(self) -> None:
+        """Ask for the screenshot folder using a hidden Tk root that is kept between calls."""
+        try:
+            if self._tk_root is None:
+                self._tk_root = tk.Tk()
+                self._tk_root.withdraw()  # Hide the main window
+            path = filedialog.askdirectory(parent=self._tk_root)
             if path:
                 self.callbacks['set_output_path'](path)
+        except Exception as e:
+            logger.error(f"Error selecting output path: {e}")
+
+    def _destroy_tk_root(self) -> None:
+        """Destroy the hidden Tk root; must run on the dialog thread that created it."""
+        if self._tk_root is not None:
+            try:
+                self._tk_root.destroy()
+            except tk.TclError:
+                pass
+            self._tk_root = None
 
+    def _begin_close(self) -> bool:
+        """Mark the tray as closing; False if stop() or close() already ran."""
+        with self._close_lock:
+            if self._closing:
+                return False
+            self._closing = True
+            return True
+
+    def stop(self) -> None:
+        """Take the icon down and release tray resources; safe to call from any thread, once."""
+        if not self._begin_close():
+            return
+        if self.icon:
+            try:
+                # Wakes pystray's blocking loop so the icon is removed instead of left behind
+                self.icon.stop()
+            except Exception as e:
+                logger.debug(f"Error stopping tray icon: {e}")
+        self._release_resources()
+
+    def close(self) -> None:
+        """Release tray resources without touching the icon; later calls do nothing."""
+        if self._begin_close():
+            self._release_resources()
+
+    def _release_resources(self) -> None:
+        """Release the hidden Tk root used for dialogs, stop the dialog and validation threads and stop clip encodes."""
+        for future in list(self._conversion_futures):
+            future.cancel()
+        with self._conversion_lock:
+            processes = list(self._conversion_processes)
+        for process in processes:
+            process.terminate()
+        # Wait for them so no encode outlives the app holding the image folders open
+        for process in processes:
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self._dialog_executor is not None:
+            self._dialog_executor.submit(self._destroy_tk_root)
+            self._dialog_executor.shutdown(wait=False)
+            self._dialog_executor = None
+        shutdown_validation()
+
+    def create_menu(self) -> pystray.Menu:
+        """Create the system tray menu."""
         def convert_to_clips(_):
             """
             Iterate over each subfolder in 'output_path', combine its images into
@@ -175,7 +405,6 @@ class SystemTray:
                     logger.error(f"Clip conversion error: {e}")
                 finally:
                     self._converting = False
-                    self._conversion_process = None
                     self.update_menu()
 
                 if self._paused:
@@ -185,106 +414,94 @@ class SystemTray:
             thread.start()
 
         return pystray.Menu(
-            pystray.MenuItem(
-                "Set YouTube URL",
-                action=lambda _: URLDialog(
-                    settings=self.callbacks['get_current_settings'](),
-                    on_save=self.callbacks['set_youtube_url']
-                ).run()
-            ),
-            pystray.MenuItem(
-                "Set Location",
-                action=lambda _: LocationDialog(
-                    settings=self.callbacks['get_current_settings'](),
-                    on_save=self.callbacks['set_location']
-                ).run()
-            ),
-            pystray.MenuItem("Set Output Path", action=select_output_path),
+            pystray.MenuItem("Set YouTube URL", action=self._open_url_dialog),
+            pystray.MenuItem("Set Location", action=self._open_location_dialog),
+            pystray.MenuItem("Set Output Path", action=self._select_output_path),
             pystray.Menu.SEPARATOR,
             pystray.MenuItem("Capture Settings", pystray.Menu(
-                pystray.MenuItem("Capture Interval", get_interval_menu()),
-                pystray.MenuItem("Resolution", get_resolution_menu()),
-                pystray.MenuItem("Time Window", get_time_window_menu())
+                # Submenus take callables so their items are only created when opened
+                pystray.MenuItem("Capture Interval", pystray.Menu(self._interval_items)),
+                pystray.MenuItem("Resolution", pystray.Menu(self._resolution_items)),
+                pystray.MenuItem("Time Window", pystray.Menu(self._time_window_items))
             )),
             pystray.Menu.SEPARATOR,
             pystray.MenuItem(
                 "Enable Scheduling",
-                action=lambda _: self.callbacks['toggle_schedule'](),
-                checked=lambda item: self.settings.get('schedule_enabled', False)
+                action=self._on_callback_click,
+                checked=functools.partial(self._is_setting_enabled, 'schedule_enabled')
             ),
             pystray.MenuItem(
                 "Capture Mode",
-                pystray.Menu(
-                    pystray.MenuItem(
-                        "Sunrise and Sunset",
-                        action=lambda _: self.callbacks['toggle_capture_mode']('both'),
-                        checked=lambda item: not self.settings.get('only_sunsets', False) and not self.settings.get('only_sunrises', False),
-                        radio=True
-                    ),
-                    pystray.MenuItem(
-                        "Only Sunrise",
-                        action=lambda _: self.callbacks['toggle_capture_mode']('sunrise'),
-                        checked=lambda item: (not self.settings.get('only_sunsets', False)
-                                            and self.settings.get('only_sunrises', False)),
-                        radio=True
-                    ),
-                    pystray.MenuItem(
-                        "Only Sunset",
-                        action=lambda _: self.callbacks['toggle_capture_mode']('sunset'),
-                        checked=lambda item: (self.settings.get('only_sunsets', False)
-                                            and not self.settings.get('only_sunrises', False)),
-                        radio=True
-                    )
-                )
+                pystray.Menu(*(
+                    pystray.MenuItem(label, self._on_capture_mode_click,
+                                     checked=self._is_capture_mode_checked, radio=True)
+                    for label in _CAPTURE_MODE_BY_LABEL
+                ))
             ),
             pystray.Menu.SEPARATOR,
             pystray.MenuItem(
                 "Convert to Clips",
                 action=convert_to_clips,
-                enabled=lambda item: not self._converting
+                enabled=self._can_convert
             ),
             # --- New setting here ---
             pystray.MenuItem(
                 "Shutdown when done",
-                action=lambda _: self.callbacks['toggle_shutdown_when_done'](),
-                checked=lambda item: self.settings.get('shutdown_when_done', False)
+                action=self._on_callback_click,
+                checked=functools.partial(self._is_setting_enabled, 'shutdown_when_done')
             ),
             pystray.Menu.SEPARATOR,
             pystray.MenuItem(
                 "Pause",
-                action=lambda _: self.callbacks['toggle_pause'](),
-                checked=lambda item: self._paused
+                action=self._on_callback_click,
+                checked=self._is_paused
             ),
-            pystray.MenuItem("Quit", action=lambda _: self.callbacks['quit']())
+            pystray.MenuItem("Quit", action=self._on_callback_click)
         )
 
+    def _get_menu(self) -> pystray.Menu:
+        """Return the tray menu, building it on first use; its state is read live on each paint."""
+        if self._menu is None:
+            self._menu = self.create_menu()
+        return self._menu
+
     def _handle_resolution_change(self, resolution: str) -> None:
         """Handle resolution change and update menu."""
-        self.callbacks['set_resolution'](resolution)
+        self._set_resolution(resolution)
         # Force menu refresh immediately after resolution change
         if self.icon:
-            new_menu = self.create_menu()
-            self.icon.menu = new_menu
             self.icon.update_menu()
 
     def update_settings(self, new_settings: Dict[str, Any]) -> None:
-        """Update settings and refresh menu."""
+        """Merge changed settings (a partial dict is fine) and refresh menu."""
         self.settings.update(new_settings)
+        self._normalize_settings()
+        self._sync_current_values()
+        if self.icon:
+            # Coalesce bursts of updates into a single menu refresh
+            with self._update_lock:
+                if self._pending_update is not None:
+                    self._pending_update.cancel()
+                self._pending_update = threading.Timer(MENU_REFRESH_DELAY, self._flush_menu_refresh)
+                self._pending_update.daemon = True
+                self._pending_update.start()
+
+    def _flush_menu_refresh(self) -> None:
+        """Repaint the menu for the latest settings once updates have settled."""
+        with self._update_lock:
+            self._pending_update = None
         if self.icon:
-            # Recreate the menu with new settings
-            new_menu = self.create_menu()
-            self.icon.menu = new_menu
-            # Force an update of the menu
             self.icon.update_menu()
 
     def run(self) -> None:
         """Run the system tray icon."""
-        icon_image = self.create_icon()
-        self.icon = pystray.Icon(
-            "Screenshot Grabber",
-            icon_image,
-            menu=self.create_menu()
-        )
+        # Reuse the existing tray icon on later runs instead of registering a new one
+        if self.icon is None:
+            self.icon = pystray.Icon(
+                "Screenshot Grabber",
+                self.create_icon(),
+                menu=self._get_menu()
+            )
         
         try:
             self.icon.run()
@@ -292,90 +509,164 @@ class SystemTray:
             logger.error(f"Error running system tray: {e}")
             raise
         finally:
-            if self.icon:
-                self.icon.stop()
+            # No-op if quitting already stopped the icon
+            self.stop()
                 
     def update_menu(self) -> None:
         """Update the system tray menu."""
         if self.icon:
-            self.icon.menu = self.create_menu()
+            self.icon.update_menu()
 
     def set_paused(self, paused: bool) -> None:
         """Set the paused state."""
         self._paused = paused
-        self.update_menu()
+        # The Pause item reads self._paused when drawn, so a repaint is enough
+        if self.icon:
+            self.icon.update_menu()
 
     def _convert_subfolders_to_clips_ffmpeg(self, base_path: str) -> None:
         """
-        For each subfolder in 'base_path', rename images to frame0001.jpg, frame0002.jpg, etc.,
-        then run FFmpeg to create a .mp4 at self.settings['fps'] fps. Upon success, delete the images.
+        Convert every subfolder in 'base_path' to a clip at self.settings['fps'] fps,
+        running several FFmpeg encodes side by side. See _encode_one for the per-folder steps.
         """
-        subfolders = [
-            d for d in os.listdir(base_path)
-            if os.path.isdir(os.path.join(base_path, d))
-        ]
-        
+        # DirEntry caches the file type from the directory read, so no extra stat per entry
+        with os.scandir(base_path) as entries:
+            subfolders = [e.name for e in entries if e.is_dir(follow_symlinks=False)]
+        if not subfolders:
+            return
+
         fps = self.settings.get('fps', 60)
+        workers = max(1, (os.cpu_count() or 1) // ENCODE_THREADS)
 
-        for folder_name in subfolders:
-            folder_path = os.path.join(base_path, folder_name)
-            
-            # Gather all .jpg images
-            image_files = [
-                f for f in os.listdir(folder_path)
-                if f.lower().endswith(".jpg")
-            ]
-            if not image_files:
-                logger.info(f"No .jpg images in '{folder_name}' - skipping.")
-                continue
-
-            # Sort them so the rename sequence (and final video sequence) matches the alphabetical order
-            image_files.sort()
-
-            # Rename them to frame0001.jpg, frame0002.jpg, etc.
-            logger.info(f"Renaming {len(image_files)} images in '{folder_name}'...")
-            for i, old_filename in enumerate(image_files, start=1):
-                new_filename = f"frame{i:04d}.jpg"  # adjust zero-padding as needed
-                old_path = os.path.join(folder_path, old_filename)
-                new_path = os.path.join(folder_path, new_filename)
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(workers, len(subfolders)),
+            thread_name_prefix='clip-encode'
+        ) as executor:
+            self._conversion_futures = {
+                executor.submit(self._encode_one, folder_name, base_path, fps): folder_name
+                for folder_name in subfolders
+            }
+            for future in concurrent.futures.as_completed(self._conversion_futures):
+                folder_name = self._conversion_futures[future]
                 try:
-                    os.rename(old_path, new_path)
+                    future.result()
+                except concurrent.futures.CancelledError:
+                    logger.info(f"Conversion of '{folder_name}' cancelled")
                 except Exception as e:
-                    logger.error(f"Could not rename {old_filename} -> {new_filename}: {e}")
+                    logger.error(f"Clip conversion error for '{folder_name}': {e}")
+        self._conversion_futures = {}
 
-            output_clip = os.path.join(base_path, f"{folder_name}.mp4")
-            logger.info(f"Converting renamed images to clip: '{output_clip}' at {fps} FPS")
+    @classmethod
+    def _get_encoder_args(cls) -> tuple:
+        """Video encoder arguments for clips, probed once per process."""
+        if cls._encoder_args is None:
+            cls._encoder_args = _probe_encoder_args()
+        return cls._encoder_args
 
-            # Build the FFmpeg command using the numeric pattern
-            cmd = [
+    def _run_ffmpeg(self, cmd: list, input_text: str) -> Tuple[int, collections.deque]:
+        """Run one FFmpeg encode fed 'input_text' on stdin, returning its exit code and the tail of its output."""
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            encoding='utf-8',  # FFmpeg reads and prints paths as UTF-8
+            errors='replace',
+            bufsize=1,
+            startupinfo=HIDDEN_STARTUPINFO,
+            creationflags=NO_WINDOW_FLAGS
+        )
+        with self._conversion_lock:
+            self._conversion_processes.add(process)
+
+        def feed_stdin():
+            try:
+                process.stdin.write(input_text)
+                process.stdin.close()
+            except OSError:
+                pass  # FFmpeg exited early; its stderr says why
+
+        # Write from a separate thread so a full stderr pipe can't deadlock the two
+        writer = threading.Thread(target=feed_stdin, daemon=True)
+        writer.start()
+        try:
+            # Keep only the tail of FFmpeg's output for error reporting
+            last_lines = collections.deque(process.stderr, maxlen=50)
+            return process.wait(), last_lines
+        finally:
+            writer.join()
+            with self._conversion_lock:
+                self._conversion_processes.discard(process)
+
+    def _encode_one(self, folder_name: str, base_path: str, fps: int) -> None:
+        """
+        Encode the images in one subfolder, in alphabetical order, to '<folder>.mp4'
+        in 'base_path' using FFmpeg's concat demuxer, then delete the images.
+        """
+        folder_path = os.path.join(base_path, folder_name)
+        
+        # Gather all .jpg images
+        with os.scandir(folder_path) as entries:
+            images = [
+                e for e in entries
+                if e.is_file() and e.name.lower().endswith(".jpg")
+            ]
+        if not images:
+            logger.info(f"No .jpg images in '{folder_name}' - skipping.")
+            return
+
+        # Skip folders whose clip is newer than every image (e.g. a repeated Convert to Clips)
+        output_clip = os.path.join(base_path, f"{folder_name}.mp4")
+        try:
+            clip_mtime = os.path.getmtime(output_clip)
+        except OSError:
+            clip_mtime = None
+        if clip_mtime is not None and clip_mtime > max(e.stat().st_mtime for e in images):
+            logger.info(f"Clip '{output_clip}' is up to date - skipping.")
+            return
+
+        # Sort them so the video sequence matches the alphabetical order
+        image_files = sorted(e.name for e in images)
+
+        # List the frames for the concat demuxer, piped to FFmpeg instead of renaming them
+        # to a numeric pattern (-pattern_type glob isn't available in Windows builds)
+        concat_list = ''.join(
+            "file '{}'\n".format(os.path.join(folder_path, name).replace("'", "'\\''"))
+            for name in image_files
+        )
+
+        logger.info(f"Converting {len(image_files)} images to clip: '{output_clip}' at {fps} FPS")
+
+        def build_cmd(encoder_args: tuple) -> list:
+            return [
                 "ffmpeg",
-                "-framerate", str(fps),
-                "-i", os.path.join(folder_path, "frame%04d.jpg"),
-                "-c:v", "libx264",
+                "-f", "concat",
+                "-safe", "0",
+                "-protocol_whitelist", "file,pipe",  # The list comes from a pipe, the frames from files
+                "-r", str(fps),  # One image per frame
+                "-i", "pipe:0",
+                *encoder_args,
                 "-pix_fmt", "yuv420p",
+                "-threads", str(ENCODE_THREADS),  # Leave cores for the other encodes
                 "-y",  # Overwrite
                 output_clip
             ]
 
-            process = subprocess.run(cmd, capture_output=True, text=True)
-            if process.returncode != 0:
-                logger.error(f"FFmpeg error for '{folder_name}':\n{process.stderr}")
-                continue
-            
-            logger.info(f"Clip created: {output_clip}. Deleting images...")
-
-            # On success, delete images
-            renamed_files = [
-                f for f in os.listdir(folder_path)
-                if f.lower().startswith('frame') and f.lower().endswith('.jpg')
-            ]
-            for img_file in renamed_files:
-                try:
-                    os.remove(os.path.join(folder_path, img_file))
-                except Exception as ex:
-                    logger.warning(f"Could not delete file {img_file}: {ex}")
+        encoder_args = self._get_encoder_args()
+        returncode, last_lines = self._run_ffmpeg(build_cmd(encoder_args), concat_list)
+        if returncode != 0 and encoder_args is not SOFTWARE_ENCODER_ARGS:
+            # The encoder is listed but the hardware isn't usable; stick to libx264 from now on
+            logger.warning(f"{encoder_args[1]} failed for '{folder_name}', falling back to libx264")
+            SystemTray._encoder_args = SOFTWARE_ENCODER_ARGS
+            returncode, last_lines = self._run_ffmpeg(build_cmd(SOFTWARE_ENCODER_ARGS), concat_list)
+        if returncode != 0:
+            logger.error(f"FFmpeg error for '{folder_name}':\n{''.join(last_lines)}")
+            return
+        
+        logger.info(f"Clip created: {output_clip}. Deleting images...")
 
-            try:
-                os.rmdir(folder_path)
-            except OSError as e:
-                logger.warning(f"Could not remove folder {folder_path}: {e}")
\ No newline at end of file
+        # On success the folder only holds the captured images, so remove it in one go
+        try:
+            shutil.rmtree(folder_path)
+        except OSError as e:
+            logger.warning(f"Could not remove folder {folder_path}: {e}")
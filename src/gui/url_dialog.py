@@ -1,15 +1,119 @@
 import logging
 import customtkinter as ctk
 import threading
-import yt_dlp
-from typing import Optional, Dict, Any, Callable, List
+import concurrent.futures
+from types import MappingProxyType
+from tkinter import TclError
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List
+from urllib.parse import parse_qs, urlsplit
+
+if TYPE_CHECKING:
+    import yt_dlp
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent yt_dlp probes when validating pasted URLs
+MAX_VALIDATION_WORKERS = 8
+
+# Hostnames accepted as YouTube, without a leading "www."
+_YT_DOMAINS = frozenset({"youtube.com", "youtu.be", "m.youtube.com", "music.youtube.com"})
+
+def is_youtube_url(url: str) -> bool:
+    """Check whether the URL's host is a YouTube domain (exact match, not a substring)."""
+    if not isinstance(url, str):
+        return False
+    try:
+        host = urlsplit(url).hostname or ''
+    except ValueError:
+        return False
+    return host.removeprefix("www.") in _YT_DOMAINS
+
+# Path prefixes that are followed by a video id, e.g. youtube.com/live/<id>
+_VIDEO_PATH_PREFIXES = ('/live/', '/shorts/', '/embed/')
+
+def _video_key(url: str) -> str:
+    """Return the video id for watch, youtu.be and /live/ style URLs, else the URL itself.
+    
+    Lets different spellings of the same video collapse into one entry.
+    """
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or '').removeprefix("www.")
+    except ValueError:
+        return url
+    if host == "youtu.be":
+        video_id = parts.path.strip('/')
+    elif host in _YT_DOMAINS and parts.path == '/watch':
+        video_id = parse_qs(parts.query).get('v', [''])[0]
+    elif host in _YT_DOMAINS and parts.path.startswith(_VIDEO_PATH_PREFIXES):
+        video_id = parts.path.split('/')[2]
+    else:
+        return url
+    return f"video:{video_id}" if video_id else url
+
+# Status codes from the HEAD pre-check that mean the page is gone; anything
+# else (including 405 or 429) still gets the full yt_dlp probe
+_GONE_STATUSES = frozenset({404, 410})
+HEAD_TIMEOUT = 3  # seconds
+
+# Only confirms a URL resolves; a flat extraction skips format lookups
+_YDL_OPTS = MappingProxyType({
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': True
+})
+
+# One YoutubeDL per pool thread, created on first use; YoutubeDL keeps per-call
+# state (playlist level, cookiejar) and must not be shared between threads
+_ydl_local = threading.local()
+
+def _get_ydl() -> 'yt_dlp.YoutubeDL':
+    """Return this thread's YoutubeDL, building its options and extractors once per thread."""
+    ydl = getattr(_ydl_local, 'ydl', None)
+    if ydl is None:
+        # Imported here so yt_dlp's extractors only load once a validation runs
+        import yt_dlp
+        ydl = _ydl_local.ydl = yt_dlp.YoutubeDL(dict(_YDL_OPTS))
+    return ydl
+
+# Probe pool reused by every dialog, created on first use
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the shared validation pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_VALIDATION_WORKERS,
+                thread_name_prefix='url-valid'
+            )
+        return _executor
+
+def shutdown_validation() -> None:
+    """Drop queued probes and stop the validation pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+def _probe_passed(future: concurrent.futures.Future) -> bool:
+    """True if a finished probe reported the URL valid; cancelled or failed probes count as invalid."""
+    return not future.cancelled() and future.exception() is None and bool(future.result())
+
 class URLDialog:
     def __init__(self, parent: Optional[ctk.CTk] = None, settings: Dict[str, Any] = None,
-                 on_save: Optional[Callable[[List[str], List[str]], None]] = None):
-        """Initialize URL dialog."""
+                 on_save: Optional[Callable[[List[str], List[str]], None]] = None,
+                 on_validated: Optional[Callable[[str], None]] = None):
+        """Initialize URL dialog.
+        
+        on_save is called as on_save(valid, invalid) once every URL has been checked;
+        only the valid URLs should be kept.
+        on_validated, if given, is called from a worker thread with each URL as soon
+        as it validates, so follow-up work can start before slower probes finish.
+        """
         self.window = ctk.CTkToplevel(parent) if parent else ctk.CTk()
         self.window.title("Set YouTube URLs")
         self.window.geometry("600x300")  # Made taller for status messages
@@ -20,13 +124,12 @@ class URLDialog:
         
         self.settings = settings or {}
         self.on_save = on_save
-        self.ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': True
-        }
+        self.on_validated = on_validated
+        # Probes of the batch in flight, cancelled if the dialog closes first
+        self._futures: List[concurrent.futures.Future] = []
         
         self._setup_ui()
+        self.window.protocol("WM_DELETE_WINDOW", self._on_cancel)
         
     def _setup_ui(self) -> None:
         """Setup the dialog UI."""
@@ -57,18 +160,10 @@ class URLDialog:
         self.save_button.pack(side="right", padx=5)
         
         # Cancel button
-        cancel_button = ctk.CTkButton(button_frame, text="Cancel", command=self.window.destroy)
+        cancel_button = ctk.CTkButton(button_frame, text="Cancel", command=self._on_cancel)
         cancel_button.pack(side="right", padx=5)
     
-    def _is_valid_youtube_url(self, url: str) -> bool:
-        """Check if the URL is a valid YouTube URL."""
-        youtube_domains = ['youtube.com', 'youtu.be', 'www.youtube.com']
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            return any(domain in parsed.netloc for domain in youtube_domains)
-        except:
-            return False
+    _is_valid_youtube_url = staticmethod(is_youtube_url)
             
     def _on_save(self) -> None:
         """Handle save button click."""
@@ -79,14 +174,107 @@ class URLDialog:
             self.window.bell()
             return
 
-        # Get all URLs first
-        urls = [url.strip() for url in urls_text.split('\n') if url.strip()]
+        # Get all URLs first; splitlines also drops \r from pasted Windows line endings.
+        # Keep the first spelling of each video, in the entered order
+        by_video: Dict[str, str] = {}
+        for line in urls_text.splitlines():
+            url = line.strip()
+            if url:
+                by_video.setdefault(_video_key(url), url)
+        urls = list(by_video.values())
         
         if self.on_save:
-            # Pass all URLs for validation, close dialog immediately
-            self.on_save(urls, [])  # Pass empty list as valid URLs initially
-            self.window.destroy()
+            # Probe the URLs off the Tk thread so the dialog stays responsive
+            self.save_button.configure(state="disabled")
+            self.status_label.configure(text=f"Checking {len(urls)} URL(s)...", text_color="gray")
+            self._validate_async(urls)
+
+    def _probe_url(self, url: str) -> bool:
+        """Return True if yt_dlp can resolve the URL."""
+        if not is_youtube_url(url):
+            return False
+        # A HEAD request rejects dead pages in ~100 ms instead of a full extraction.
+        # It is only a shortcut: any failure here (requests missing, odd URL) falls
+        # through to yt_dlp
+        try:
+            # Imported here so requests only loads once a validation runs
+            import requests
+            status = requests.head(url, allow_redirects=True, timeout=HEAD_TIMEOUT).status_code
+            if status in _GONE_STATUSES:
+                logger.warning(f"Could not resolve {url}: HTTP {status}")
+                return False
+        except Exception as e:
+            logger.debug(f"HEAD check failed for {url}, trying yt_dlp: {e}")
+        try:
+            return _get_ydl().extract_info(url, download=False) is not None
+        except Exception as e:
+            logger.warning(f"Could not resolve {url}: {e}")
+            return False
+
+    def _validate_async(self, urls: List[str]) -> None:
+        """Validate the URLs in parallel, then hand the result back to the Tk thread.
+        
+        Completion callbacks report progress, so no thread sits waiting on the probes.
+        """
+        executor = _get_executor()
+        futures = self._futures = [executor.submit(self._probe_url, url) for url in urls]
+        
+        # Only the count of unfinished probes is shared; results stay on their futures
+        url_of = dict(zip(futures, urls))
+        remaining = len(futures)
+        lock = threading.Lock()
+        
+        def on_done(future: concurrent.futures.Future) -> None:
+            nonlocal remaining
+            try:
+                if not future.cancelled() and future.exception() is not None:
+                    logger.warning(f"Could not resolve {url_of[future]}: {future.exception()}")
+                elif self.on_validated and _probe_passed(future):
+                    self.on_validated(url_of[future])
+            except Exception as e:  # Must not stop the count below
+                logger.error(f"Error handling validated URL {url_of[future]}: {e}")
+            finally:
+                with lock:
+                    remaining -= 1
+                    left = remaining
+            self._post(self.status_label.configure,
+                       text=f"Checked {len(urls) - left}/{len(urls)} URL(s)...")
+            if not left:
+                # Keep the order the URLs were entered in
+                valid = [url for url, f in zip(urls, futures) if _probe_passed(f)]
+                self._post(self._finish_save, urls, valid)
+        
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def _post(self, func: Callable, *args, **kwargs) -> None:
+        """Run func on the Tk thread; ignored once the dialog has been closed."""
+        try:
+            self.window.after(0, lambda: func(*args, **kwargs))
+        except (TclError, RuntimeError):
+            pass
+
+    def _finish_save(self, urls: List[str], valid: List[str]) -> None:
+        """Save the validated URLs and close, or keep the dialog open if none validated."""
+        validated = set(valid)
+        invalid = [url for url in urls if url not in validated]
+        if invalid:
+            logger.warning(f"Could not validate {len(invalid)} URL(s): {', '.join(invalid)}")
+        if not valid:
+            # Nothing usable: keep the current URLs and let the user fix the list
+            self.status_label.configure(text=f"Rejected: {', '.join(invalid)}", text_color="red")
+            self.save_button.configure(state="normal")
+            self.window.bell()
+            return
+        self.on_save(valid, invalid)
+        self.window.destroy()
             
+    def _on_cancel(self) -> None:
+        """Close the dialog and drop any probes that have not started yet."""
+        for future in self._futures:
+            future.cancel()
+        self.window.destroy()
+
     def run(self) -> None:
         """Run the dialog."""
         self.window.mainloop()
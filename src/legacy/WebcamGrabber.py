@@ -1,23 +1,27 @@
 import os
-import subprocess
 from datetime import datetime, timedelta
 from astral import LocationInfo
 from astral.sun import sun
 import time
 import threading
+import queue
+import atexit
 from plyer import notification
 from pystray import Icon, MenuItem, Menu
-from PIL import Image, ImageDraw
+from PIL import Image
 from zoneinfo import ZoneInfo
 import tkinter as tk
 from tkinter import filedialog
 import logging
-import yt_dlp
-import customtkinter as ctk
-import tkintermapview
 import json
 import re
-import cv2
+import urllib.parse
+import functools
+import io
+import base64
+from dataclasses import dataclass
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Set up logging first
 logging.basicConfig(
@@ -35,10 +39,6 @@ for logger_name in logging.root.manager.loggerDict:
 
 logging.info("Starting WebcamGrabber...")
 
-# Set customtkinter appearance
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
-
 # Constants
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), "config.json")
 OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "screenshots")
@@ -59,13 +59,64 @@ DEFAULT_SETTINGS = {
     }
 }
 
-stream_info_cache = {
-    'url': None,
-    'stream_url': None,
-    'title': None,
-    'format': None,
-    'last_updated': None
-}
+@dataclass(slots=True)
+class _StreamCache:
+    """Stream info for the current YouTube URL."""
+    url: Optional[str] = None
+    stream_url: Optional[str] = None
+    title: Optional[str] = None
+    format: Optional[dict] = None
+    expires_monotonic: Optional[float] = None  # time.monotonic() deadline for refreshing stream_url
+
+_stream_cache = _StreamCache()
+
+# Stream info lifetime when the stream URL doesn't say when it expires
+STREAM_INFO_TTL = 3600
+# Refresh this many seconds before the stream URL's own expiry
+STREAM_EXPIRY_MARGIN = 60
+_EXPIRE_PATH = re.compile(r'/expire/(\d+)(?:/|$)')
+
+# Shared requests.Session for geolocation lookups, created on first use
+_http = None
+
+def _get_http_session():
+    """Return the shared HTTP session, keeping connections and DNS warm between probes."""
+    global _http
+    if _http is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2,
+                              max_retries=Retry(total=1, backoff_factor=0.2))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _http = session
+    return _http
+
+def _probe_geolocation(http, service):
+    """Fetch one geolocation service and return a location dict, or None."""
+    response = http.get(service, timeout=5)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    # ip-api.com format
+    if 'lat' in data and 'lon' in data:
+        return {
+            'name': data.get('city', 'Unknown'),
+            'region': data.get('country', 'Unknown'),
+            'latitude': float(data.get('lat', 0)),
+            'longitude': float(data.get('lon', 0))
+        }
+    # ipapi.co format
+    if 'latitude' in data and 'longitude' in data:
+        return {
+            'name': data.get('city', 'Unknown'),
+            'region': data.get('country_name', 'Unknown'),
+            'latitude': float(data.get('latitude', 0)),
+            'longitude': float(data.get('longitude', 0))
+        }
+    return None
 
 def get_windows_location():
     """Get the user's location from Windows settings."""
@@ -94,7 +145,7 @@ def get_windows_location():
         logging.info(f"Local timezone: {timezone}")
         
         # Use IP-based geolocation
-        import requests
+        http = _get_http_session()
         logging.info("Fetching location from IP geolocation service...")
         
         # Try multiple geolocation services
@@ -103,45 +154,30 @@ def get_windows_location():
             'https://ipapi.co/json/',   # Backup service
         ]
         
-        for service in services:
-            try:
-                response = requests.get(service, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
+        # Query all services at once and take the first usable answer
+        executor = ThreadPoolExecutor(max_workers=len(services))
+        try:
+            futures = {executor.submit(_probe_geolocation, http, service): service for service in services}
+            for future in as_completed(futures):
+                service = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logging.warning(f"Failed to get location from {service}: {str(e)}")
+                    continue
+                if data is not None:
                     logging.info(f"Geolocation data received from {service}: {data}")
-                    
-                    # ip-api.com format
-                    if 'lat' in data and 'lon' in data:
-                        return {
-                            'name': data.get('city', 'Unknown'),
-                            'region': data.get('country', 'Unknown'),
-                            'timezone': timezone,  # Use normalized timezone
-                            'latitude': float(data.get('lat', 0)),
-                            'longitude': float(data.get('lon', 0))
-                        }
-                    # ipapi.co format
-                    elif 'latitude' in data and 'longitude' in data:
-                        return {
-                            'name': data.get('city', 'Unknown'),
-                            'region': data.get('country_name', 'Unknown'),
-                            'timezone': timezone,  # Use normalized timezone
-                            'latitude': float(data.get('latitude', 0)),
-                            'longitude': float(data.get('longitude', 0))
-                        }
-            except Exception as e:
-                logging.warning(f"Failed to get location from {service}: {str(e)}")
-                continue
+                    data['timezone'] = timezone  # Use normalized timezone
+                    return data
+        finally:
+            # Don't wait for the slower service
+            executor.shutdown(wait=False, cancel_futures=True)
         
         logging.warning("All geolocation services failed")
     except Exception as e:
         logging.warning(f"Failed to get Windows location: {str(e)}")
     return None
 
-# Try to get Windows location first
-logging.info("Getting initial location...")
-windows_location = get_windows_location()
-logging.info(f"Windows location result: {windows_location}")
-
 def load_settings():
     """Load settings from config file."""
     try:
@@ -157,21 +193,73 @@ def load_settings():
         logging.error(f"Error loading settings: {e}")
         return DEFAULT_SETTINGS.copy()
 
+# Delay before a save_settings() call hits the disk; later calls restart it
+SAVE_DEBOUNCE_SECONDS = 0.3
+_save_timer = None
+_save_lock = threading.Lock()
+
 def save_settings():
-    """Save current settings to config file."""
+    """Schedule a write of the current settings to the config file."""
+    global _window_td, _capture_bounds, _save_timer
+    _window_td = timedelta(minutes=settings['capture_window_minutes'])
+    _capture_bounds = None
+    with _save_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+        _save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, _save_settings_now)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+def _save_settings_now():
+    """Write the current settings to the config file atomically."""
+    global _save_timer
+    with _save_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+            _save_timer = None
+    tmp_file = CONFIG_FILE + ".tmp"
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(settings, f, indent=4)
+        with open(tmp_file, 'w') as f:
+            json.dump(dict(settings), f, indent=4)
+        os.replace(tmp_file, CONFIG_FILE)
     except Exception as e:
         logging.error(f"Error saving settings: {e}")
 
+def flush_settings():
+    """Write a pending debounced save immediately."""
+    if _save_timer is not None:
+        _save_settings_now()
+
+atexit.register(flush_settings)
+
 # Initialize settings
 settings = load_settings()
 
-# Create hidden root window for dialogs
-root = tk.Tk()
-root.withdraw()  # Hide the root window
-root.attributes('-alpha', 0)  # Make it fully transparent
+# Capture window half-width, recomputed whenever settings are saved
+_window_td = timedelta(minutes=settings['capture_window_minutes'])
+
+# customtkinter module, imported and themed when the first dialog opens
+_ctk = None
+
+def _load_ctk():
+    """Import customtkinter on first use and apply the app's appearance."""
+    global _ctk
+    if _ctk is None:
+        import customtkinter
+        customtkinter.set_appearance_mode("dark")
+        customtkinter.set_default_color_theme("blue")
+        _ctk = customtkinter
+    return _ctk
+
+def _dialog_root():
+    """Create a hidden Tk root to parent one dialog; the caller destroys it afterwards."""
+    root = tk.Tk()
+    root.withdraw()  # Hide the root window
+    root.attributes('-alpha', 0)  # Make it fully transparent
+    return root
+
+# LocationInfo objects keyed on the location settings they were built from
+_location_cache = {}
 
 def get_location_info():
     """Get LocationInfo object from current settings."""
@@ -186,20 +274,50 @@ def get_location_info():
         save_settings()
         logging.info(f"Using fallback timezone: {timezone}")
     
-    return LocationInfo(
-        name=settings['location']['name'],
-        region=settings['location']['region'],
-        timezone=timezone,
-        latitude=settings['location']['latitude'],
-        longitude=settings['location']['longitude']
-    )
+    loc = settings['location']
+    key = (loc['name'], loc['region'], timezone, round(loc['latitude'], 6), round(loc['longitude'], 6))
+    location = _location_cache.get(key)
+    if location is None:
+        location = LocationInfo(
+            name=loc['name'],
+            region=loc['region'],
+            timezone=timezone,
+            latitude=loc['latitude'],
+            longitude=loc['longitude']
+        )
+        _location_cache[key] = location
+    return location
+
+def _invalidate_location_cache():
+    """Forget cached LocationInfo objects after settings['location'] changes."""
+    global _capture_bounds
+    _location_cache.clear()
+    _capture_bounds = None
+
+@functools.lru_cache(maxsize=16)
+def _zoneinfo(timezone):
+    """Return the ZoneInfo for a timezone name; memoized."""
+    return ZoneInfo(timezone)
+
+@functools.lru_cache(maxsize=512)
+def _compute_sun(day, latitude, longitude, timezone):
+    """Compute sunrise and sunset for a day and (rounded) coordinates; memoized."""
+    observer = LocationInfo(timezone=timezone, latitude=latitude, longitude=longitude).observer
+    s = sun(observer, date=day)
+    return s['sunrise'], s['sunset']
 
-def get_sun_times():
-    """Get sunrise and sunset times for the current location."""
+def get_sun_times(latitude=None, longitude=None, day=None):
+    """Get sunrise and sunset times for the current location, or for the given coordinates/day."""
     location = get_location_info()
+    if latitude is None:
+        latitude = location.latitude
+    if longitude is None:
+        longitude = location.longitude
     try:
-        s = sun(location.observer, date=datetime.now(ZoneInfo(location.timezone)).date())
-        return s['sunrise'], s['sunset']
+        if day is None:
+            day = datetime.now(_zoneinfo(location.timezone)).date()
+        # 4 decimals (~11 m) is far below astral's precision, so nearby clicks share entries
+        return _compute_sun(day, round(float(latitude), 4), round(float(longitude), 4), location.timezone)
     except Exception as e:
         logging.error(f"Error getting sun times: {e}")
         # Return None values to indicate error
@@ -207,6 +325,9 @@ def get_sun_times():
 
 def set_location(icon, item):
     """Open dialog to set location."""
+    import tkintermapview
+    ctk = _load_ctk()
+    root = _dialog_root()
     dialog = ctk.CTkToplevel(root)  # Use root as parent
     dialog.title("Set Location")
     dialog.geometry("1000x600")
@@ -241,14 +362,7 @@ def set_location(icon, item):
     def update_sun_times(lat, lon):
         """Update sun times based on coordinates"""
         try:
-            # Temporarily update location to get sun times
-            current_location = settings['location'].copy()
-            settings['location'].update({
-                'latitude': float(lat),
-                'longitude': float(lon)
-            })
-            
-            sun_times = get_sun_times()
+            sun_times = get_sun_times(lat, lon)
             if sun_times and all(sun_times):  # Check that neither sunrise nor sunset is None
                 sunrise = sun_times[0].strftime('%H:%M')
                 sunset = sun_times[1].strftime('%H:%M')
@@ -260,9 +374,6 @@ def set_location(icon, item):
                 sunset_entry.delete(0, tk.END)
                 sunset_entry.insert(0, sunset)
                 sunset_entry.configure(state="readonly")
-            
-            # Restore original location
-            settings['location'] = current_location
         except Exception as e:
             logging.error(f"Failed to update sun times: {e}")
 
@@ -273,6 +384,7 @@ def set_location(icon, item):
                 'latitude': float(lat),
                 'longitude': float(lon)
             })
+            _invalidate_location_cache()
             save_settings()
             
             # Update the schedule thread
@@ -456,75 +568,52 @@ def set_location(icon, item):
     
     # Start the dialog
     dialog.wait_window()
+    root.destroy()
+
+# Set to make the schedule thread recompute the next capture window immediately
+_schedule_wakeup = threading.Event()
+
+def next_capture_window(now, sunrise, sunset):
+    """Return (start, description) of the next capture window after now."""
+    window = _window_td
+    if now < sunrise - window:
+        return sunrise - window, "sunrise"
+    if now < sunset - window:
+        return sunset - window, "sunset"
+    tomorrow = now.date() + timedelta(days=1)
+    next_sunrise = get_sun_times(day=tomorrow)[0]
+    return next_sunrise - window, "tomorrow's sunrise"
 
 def update_schedule_thread():
     """Update the schedule thread based on current settings."""
     global schedule_thread
     
-    # Stop existing thread if running
-    if schedule_thread and schedule_thread.is_alive():
-        schedule_thread = None
-    
-    # Start new thread if scheduling is enabled
-    if settings['schedule_enabled']:
+    # Start the thread if scheduling is enabled and it isn't running yet
+    if settings['schedule_enabled'] and not (schedule_thread and schedule_thread.is_alive()):
         schedule_thread = threading.Thread(target=schedule_screenshots, daemon=True)
         schedule_thread.start()
-        
-        # Force immediate schedule update
-        sunrise, sunset = get_sun_times()
-        now = datetime.now(sunrise.tzinfo)
-        window_minutes = settings['capture_window_minutes']
-        if now < sunrise - timedelta(minutes=window_minutes):
-            next_window = sunrise - timedelta(minutes=window_minutes)
-            window_type = "sunrise"
-        elif now < sunset - timedelta(minutes=window_minutes):
-            next_window = sunset - timedelta(minutes=window_minutes)
-            window_type = "sunset"
-        else:
-            tomorrow = now.date() + timedelta(days=1)
-            next_sunrise = sun(get_location_info().observer, date=tomorrow)['sunrise']
-            next_window = next_sunrise - timedelta(minutes=window_minutes)
-            window_type = "tomorrow's sunrise"
-        
-        time_until = next_window - now
-        logging.info(f"Next capture window: {window_type} at {next_window} (in {time_until})")
+    
+    # Force immediate schedule update
+    _schedule_wakeup.set()
 
 def schedule_screenshots():
     """Monitor schedule and log next capture windows."""
-    last_date = None
     while True:
+        _schedule_wakeup.clear()
+        timeout = None  # Disabled: sleep until settings change
         try:
             if settings['schedule_enabled']:
                 sunrise, sunset = get_sun_times()
                 now = datetime.now(sunrise.tzinfo)
-                current_date = now.date()
-                
-                # Only update if it's a new day
-                if current_date != last_date:
-                    window_minutes = settings['capture_window_minutes']
-                    if now < sunrise - timedelta(minutes=window_minutes):
-                        next_window = sunrise - timedelta(minutes=window_minutes)
-                        window_type = "sunrise"
-                    elif now < sunset - timedelta(minutes=window_minutes):
-                        next_window = sunset - timedelta(minutes=window_minutes)
-                        window_type = "sunset"
-                    else:
-                        # Wait for tomorrow's sunrise
-                        tomorrow = now.date() + timedelta(days=1)
-                        next_sunrise = sun(get_location_info().observer, date=tomorrow)['sunrise']
-                        next_window = next_sunrise - timedelta(minutes=window_minutes)
-                        window_type = "tomorrow's sunrise"
-                    
-                    time_until = next_window - now
-                    logging.info(f"Next capture window: {window_type} at {next_window} (in {time_until})")
-                    last_date = current_date
-            
-            # Sleep for 3 hours
-            time.sleep(60 * 60 * 3)
-            
+                next_window, window_type = next_capture_window(now, sunrise, sunset)
+                time_until = next_window - now
+                logging.info(f"Next capture window: {window_type} at {next_window} (in {time_until})")
+                # Sleep until the window opens, or until settings change
+                timeout = max(1.0, time_until.total_seconds())
         except Exception as e:
             logging.error(f"Error in schedule thread: {e}")
-            time.sleep(60)  # On error, retry after a minute
+            timeout = 60  # On error, retry after a minute
+        _schedule_wakeup.wait(timeout)
 
 def test_screenshots():
     """Take screenshots at regular intervals."""
@@ -549,69 +638,185 @@ def test_screenshots():
             logging.error(f"Error in screenshot thread: {str(e)}")
             time.sleep(settings['interval'])
 
+def _ydl_options(preferred_resolution):
+    """yt_dlp options that let its format selector pick the stream closest to (not above) the preferred resolution."""
+    height = int(preferred_resolution.rstrip('p'))
+    return {
+        'quiet': True,
+        'skip_download': True,
+        'format': f'bestvideo[height<={height}]/best[height<={height}]/best',
+        'youtube_include_dash_manifest': False,
+        # Live streams are only offered over HLS, so only the subtitle work is skipped
+        'extractor_args': {'youtube': {'skip': ['translated_subs']}},
+    }
+
+def _stream_url_lifetime(stream_url):
+    """Seconds the signed stream URL stays usable, from its 'expire' field, else STREAM_INFO_TTL."""
+    parsed = urllib.parse.urlsplit(stream_url)
+    expire = urllib.parse.parse_qs(parsed.query).get('expire', [None])[0]
+    if expire is None:
+        # HLS manifest URLs carry it as a path segment: .../expire/<epoch>/...
+        match = _EXPIRE_PATH.search(parsed.path)
+        expire = match.group(1) if match else None
+    if expire is None or not expire.isdigit():
+        return STREAM_INFO_TTL
+    return max(0, int(expire) - time.time() - STREAM_EXPIRY_MARGIN)
+
 def get_stream_info():
     """Get stream information, using cache if available and not expired."""
-    global stream_info_cache
-    
     current_url = settings['youtube_url']
-    current_time = datetime.now()
     
-    # If URL changed or cache expired (after 1 hour), refresh cache
+    # If URL changed or the stream URL is about to expire, refresh cache
     cache_valid = (
-        stream_info_cache['url'] == current_url and
-        stream_info_cache['last_updated'] and
-        (current_time - stream_info_cache['last_updated']).total_seconds() < 3600
+        _stream_cache.url == current_url and
+        _stream_cache.expires_monotonic is not None and
+        time.monotonic() < _stream_cache.expires_monotonic
     )
     
     if not cache_valid:
         logging.info("Fetching fresh stream info...")
+        import yt_dlp
         try:
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            with yt_dlp.YoutubeDL(_ydl_options(settings['preferred_resolution'])) as ydl:
                 info = ydl.extract_info(current_url, download=False)
-                best_format = get_best_matching_format(info['formats'], settings['preferred_resolution'])
-                
-                if not best_format:
+                if not info.get('url'):
                     raise Exception("No suitable video format found")
+                # yt_dlp merges the selected format's fields into info
+                best_format = {
+                    'format_id': info.get('format_id'),
+                    'width': info.get('width'),
+                    'height': info.get('height'),
+                }
                 
                 # Update cache
-                stream_info_cache.update({
-                    'url': current_url,
-                    'stream_url': best_format['url'],
-                    'title': info.get('title', 'untitled'),
-                    'format': best_format,
-                    'last_updated': current_time
-                })
+                _stream_cache.url = current_url
+                _stream_cache.stream_url = info['url']
+                _stream_cache.title = info.get('title', 'untitled')
+                _stream_cache.format = best_format
+                _stream_cache.expires_monotonic = time.monotonic() + _stream_url_lifetime(info['url'])
                 
                 actual_height = best_format.get('height', 'unknown')
                 logging.info(f"Selected format: {actual_height}p (wanted {settings['preferred_resolution']})")
-                logging.info(f"Video title: {stream_info_cache['title']}")
+                logging.info(f"Video title: {_stream_cache.title}")
                 logging.info(f"Selected resolution: {actual_height}p")
                 logging.info("Successfully got stream URL")
         except Exception as e:
             logging.error(f"Error fetching stream info: {e}")
             # Clear cache on error
-            stream_info_cache['url'] = None
+            _stream_cache.url = None
             raise
     
-    return stream_info_cache
+    return _stream_cache
+
+# Frames waiting to be encoded and written by _frame_writer
+_write_q = queue.Queue(maxsize=4)
+
+# libjpeg-turbo encoder, if PyTurboJPEG is installed; looked up on first use
+_tj = None
+_tj_subsample = None
+_tj_checked = False
+
+def _encode_jpeg(frame):
+    """Encode a BGR frame as JPEG, using libjpeg-turbo when available."""
+    global _tj, _tj_subsample, _tj_checked
+    if not _tj_checked:
+        _tj_checked = True
+        try:
+            from turbojpeg import TurboJPEG, TJSAMP_420
+            _tj, _tj_subsample = TurboJPEG(), TJSAMP_420
+        except Exception as e:  # Module or native library missing
+            logging.info(f"PyTurboJPEG not available, encoding with OpenCV: {e}")
+    if _tj is not None:
+        return _tj.encode(frame, quality=92, jpeg_subsample=_tj_subsample)
+    import cv2
+    ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 92])
+    if not ok:
+        raise Exception("Could not encode frame")
+    return buf.tobytes()
+
+def _frame_writer():
+    """Encode and write queued frames so disk I/O doesn't delay the next capture."""
+    while True:
+        # Take everything that piled up so a backlog is written as one batch
+        pending = [_write_q.get()]
+        while True:
+            try:
+                pending.append(_write_q.get_nowait())
+            except queue.Empty:
+                break
+        
+        written = []
+        for frame, output_file in pending:
+            try:
+                data = _encode_jpeg(frame)
+                try:
+                    f = open(output_file, 'wb')
+                except FileNotFoundError:
+                    # Output directory was removed while running
+                    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                    f = open(output_file, 'wb')
+                with f:
+                    f.write(data)
+                logging.info(f"Screenshot saved successfully. Size: {len(data)} bytes")
+                written.append(output_file)
+            except Exception as e:
+                error_msg = f"Failed to write screenshot: {str(e)}"
+                logging.error(error_msg)
+                notify("Error", error_msg)
+            finally:
+                _write_q.task_done()
+        
+        # One notification per batch rather than one per frame
+        if len(written) == 1:
+            notify("Screenshot Captured", f"Saved to: {written[0]}")
+        elif written:
+            notify("Screenshots Captured", f"Saved {len(written)} screenshots to: {os.path.dirname(written[-1])}")
+
+def _grab_frame(stream_url):
+    """Open the stream, read one frame at the live edge and close it again.
+    
+    A capture kept open between screenshots would hand back the next buffered
+    frame rather than the newest one (the FFmpeg backend ignores
+    CAP_PROP_BUFFERSIZE), so each screenshot reconnects like ffmpeg -vframes 1.
+    """
+    import cv2
+    cap = cv2.VideoCapture(stream_url, cv2.CAP_FFMPEG)
+    try:
+        if not cap.isOpened():
+            raise Exception("Could not open stream")
+        ok, frame = cap.read()
+        if not ok:
+            raise Exception("Could not read a frame from the stream")
+        return frame
+    finally:
+        cap.release()
+
+def _fit_frame(frame, width, height):
+    """Shrink frame to fit within width x height, keeping its aspect ratio.
+    
+    Same as ffmpeg's scale=W:H:force_original_aspect_ratio=decrease; frames that
+    already fit are returned as they are.
+    """
+    if not width or not height:
+        return frame
+    frame_h, frame_w = frame.shape[:2]
+    factor = min(width / frame_w, height / frame_h)
+    if factor >= 1:
+        return frame
+    import cv2
+    size = (max(1, round(frame_w * factor)), max(1, round(frame_h * factor)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
 
 def capture_screenshot():
     """Capture a screenshot from the YouTube stream."""
     try:
         logging.info("Taking screenshot...")
         
-        # Create output directory if it doesn't exist
-        if not os.path.exists(settings['output_path']):
-            logging.info(f"Creating output directory: {settings['output_path']}")
-            os.makedirs(settings['output_path'])
-
         # Get stream info from cache
         try:
             stream_info = get_stream_info()
-            stream_url = stream_info['stream_url']
-            video_title = stream_info['title']
-            best_format = stream_info['format']
-            actual_height = best_format.get('height', 'unknown')
+            stream_url = stream_info.stream_url
+            video_title = stream_info.title
 
             # Create filename with full timestamp and cleaned title
             timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
@@ -619,36 +824,19 @@ def capture_screenshot():
             output_file = os.path.join(settings['output_path'], f"{timestamp}_{cleaned_title}.jpg")
             logging.info(f"Output file will be: {output_file}")
 
-            # Use ffmpeg to capture screenshot
-            logging.info("Running ffmpeg to capture screenshot...")
-            startupinfo = None
-            if os.name == 'nt':  # Windows
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            ffmpeg_cmd = [
-                "ffmpeg", "-y", "-i", stream_url,
-                "-vframes", "1",
-                "-q:v", "2",
-                "-vf", f"scale={best_format['width']}:{best_format['height']}:force_original_aspect_ratio=decrease",
-                output_file
-            ]
-            subprocess.run(ffmpeg_cmd, capture_output=True, check=True, startupinfo=startupinfo)
-            
-            if os.path.exists(output_file):
-                file_size = os.path.getsize(output_file)
-                logging.info(f"Screenshot saved successfully. Size: {file_size} bytes")
-                notify("Screenshot Captured", f"Saved to: {output_file}")
-                return True
-            else:
-                raise Exception("Screenshot file was not created")
+            # Grab the newest frame, scaled to the selected format like the ffmpeg capture did
+            logging.info("Grabbing frame from stream...")
+            best_format = stream_info.format or {}
+            frame = _fit_frame(_grab_frame(stream_url), best_format.get('width'), best_format.get('height'))
+            # Hand the frame to the writer thread; blocks if it's falling behind
+            _write_q.put((frame, output_file), block=True)
+            return True
 
         except Exception as e:
             error_msg = f"Failed to capture screenshot: {str(e)}"
             logging.error(f"{error_msg}")
             logging.error(f"Stream info cache will be cleared")
-            stream_info_cache['url'] = None  # Clear cache on error
+            _stream_cache.url = None  # Clear cache on error
             notify("Error", error_msg)
             return False
 
@@ -687,6 +875,8 @@ def set_youtube_url(icon, item):
             return
 
     # Create the dialog window
+    ctk = _load_ctk()
+    root = _dialog_root()
     dialog = ctk.CTkToplevel(root)  # Use root as parent
     dialog.title("Set YouTube URL")
     dialog.geometry("380x110")
@@ -716,22 +906,32 @@ def set_youtube_url(icon, item):
     
     # Start the dialog
     dialog.wait_window()
+    root.destroy()
 
 def select_output_path(icon, item):
     """Open a directory selection dialog."""
     # Create a hidden root window for the dialog
-    new_path = filedialog.askdirectory(
-        title="Select Screenshot Directory",
-        initialdir=settings['output_path']
-    )
+    root = _dialog_root()
+    try:
+        new_path = filedialog.askdirectory(
+            parent=root,
+            title="Select Screenshot Directory",
+            initialdir=settings['output_path']
+        )
+    finally:
+        root.destroy()
     
     if new_path:  # If a directory was selected
         settings['output_path'] = new_path
         os.makedirs(settings['output_path'], exist_ok=True)
         notify("Settings Updated", f"New screenshot directory: {new_path}")
 
-def create_menu(icon=None):
-    """Create the system tray menu."""
+def _pause_label(item):
+    """Menu text for the pause item, re-read whenever the menu is refreshed."""
+    return "▶ Resume" if settings['is_paused'] else "⬛ Pause"
+
+def create_menu():
+    """Create the system tray menu; built once, with labels and checks read from settings."""
     logging.info("[create_menu] Creating system tray menu")
     logging.info(f"[create_menu] Current settings - Interval: {settings['interval']}s, Paused: {settings['is_paused']}")
 
@@ -747,37 +947,44 @@ def create_menu(icon=None):
 
     # Create main menu items
     menu_items = [
-        MenuItem("⬛ Pause" if not settings['is_paused'] else "▶ Resume", toggle_pause),
+        MenuItem(_pause_label, toggle_pause),
         MenuItem("Settings", settings_menu),
         MenuItem("Exit", quit_program)
     ]
     
-    menu = Menu(*menu_items)
-    
-    # If icon exists, update its menu, otherwise return the new menu
-    if icon:
-        icon.menu = menu
-    return menu
+    return Menu(*menu_items)
+
+# (valid_until, sunrise_start, sunrise_end, sunset_start, sunset_end) as epoch seconds
+_capture_bounds = None
+
+def _compute_capture_bounds():
+    """Return today's capture window bounds as epoch seconds, valid until local midnight."""
+    location = get_location_info()
+    tz = _zoneinfo(location.timezone)
+    today = datetime.now(tz).date()
+    sunrise, sunset = get_sun_times(day=today)
+    tomorrow = today + timedelta(days=1)
+    midnight = datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=tz)
+    return (midnight.timestamp(),
+            (sunrise - _window_td).timestamp(), (sunrise + _window_td).timestamp(),
+            (sunset - _window_td).timestamp(), (sunset + _window_td).timestamp())
 
 def should_capture_now():
     """Check if we should capture based on schedule."""
+    global _capture_bounds
     if not settings['schedule_enabled']:
         return True
         
     try:
-        sunrise, sunset = get_sun_times()
-        now = datetime.now(sunrise.tzinfo)
-        
-        # Capture window is configurable minutes before and after sunrise/sunset
-        window_minutes = settings['capture_window_minutes']
-        sunrise_start = sunrise - timedelta(minutes=window_minutes)
-        sunrise_end = sunrise + timedelta(minutes=window_minutes)
-        sunset_start = sunset - timedelta(minutes=window_minutes)
-        sunset_end = sunset + timedelta(minutes=window_minutes)
+        now = time.time()
+        # Sun times only change daily; location and window changes reset the cache
+        if _capture_bounds is None or now >= _capture_bounds[0]:
+            _capture_bounds = _compute_capture_bounds()
+        _, sunrise_start, sunrise_end, sunset_start, sunset_end = _capture_bounds
         
         in_window = (sunrise_start <= now <= sunrise_end) or (sunset_start <= now <= sunset_end)
         if in_window:
-            logging.info(f"In capture window: {now}")
+            logging.info(f"In capture window: {datetime.fromtimestamp(now)}")
         return in_window
     except Exception as e:
         logging.error(f"Error checking schedule: {e}")
@@ -792,7 +999,7 @@ def create_menu_item(text, interval):
         logging.info(f"Changed interval from {old_interval}s to {interval}s")
         notify("Interval Changed", f"Screenshot interval set to {interval} seconds")
         # Update the menu to show new checked state
-        create_menu(icon)
+        icon.update_menu()
     return MenuItem(text, set_interval, checked=lambda item: settings['interval'] == interval)
 
 def get_interval_menu():
@@ -814,7 +1021,7 @@ def create_resolution_menu_item(text, resolution):
         logging.info(f"Changed resolution from {old_resolution} to {resolution}")
         notify("Resolution Changed", f"Screenshot resolution set to {resolution}")
         # Update menu to show new checked state
-        create_menu(icon)
+        icon.update_menu()
     return MenuItem(text, set_resolution, checked=lambda item: settings['preferred_resolution'] == resolution)
 
 def get_resolution_menu():
@@ -842,7 +1049,7 @@ def create_time_window_menu_item(text, minutes):
         logging.info(f"Changed capture window from {old_window} to {minutes} minutes")
         notify("Time Window Changed", f"Capture window set to {minutes} minutes before/after sunrise/sunset")
         # Update menu to show new checked state
-        create_menu(icon)
+        icon.update_menu()
     return MenuItem(text, set_time_window, checked=lambda item: settings['capture_window_minutes'] == minutes)
 
 def get_time_window_menu():
@@ -856,39 +1063,6 @@ def get_time_window_menu():
         create_time_window_menu_item("90 minutes", 90)
     )
 
-def get_best_matching_format(formats, preferred_resolution):
-    """Find the best matching format for the preferred resolution."""
-    # Extract height from preferred resolution (e.g., '1080p' -> 1080)
-    target_height = int(preferred_resolution.replace('p', ''))
-    
-    # Filter for mp4 formats with both video and audio
-    valid_formats = [
-        f for f in formats 
-        if f.get('ext') == 'mp4' and 
-        f.get('acodec') != 'none' and 
-        f.get('vcodec') != 'none'
-    ]
-    
-    if not valid_formats:
-        logging.warning("No valid mp4 formats found, falling back to any format")
-        valid_formats = formats
-    
-    # Sort formats by how close they are to the target resolution
-    valid_formats.sort(
-        key=lambda f: (
-            abs(f.get('height', 0) - target_height),  # Distance from target height
-            -f.get('height', 0),  # Prefer higher resolution if same distance
-            -f.get('filesize', 0)  # Prefer larger filesize if same height
-        )
-    )
-    
-    best_format = valid_formats[0] if valid_formats else None
-    if best_format:
-        actual_height = best_format.get('height', 'unknown')
-        logging.info(f"Selected format: {actual_height}p (wanted {preferred_resolution})")
-    
-    return best_format
-
 def toggle_pause(icon, item):
     """Toggle the pause state."""
     settings['is_paused'] = not settings['is_paused']
@@ -905,55 +1079,41 @@ def toggle_pause(icon, item):
     state = "paused" if settings['is_paused'] else "resumed"
     notify("Capture Status", f"Screenshot capture {state}")
     
-    # Recreate the entire menu to update the text
-    icon.menu = create_menu(icon)
+    # Refresh the menu to update the text
+    icon.update_menu()
+
+# 32x32 camera tray icon as PNG bytes (base64), so startup does no drawing or resampling
+_ICON_PNG_B64 = (
+    'iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAADKklEQVR42u2WT2tbRxTFf3dm'
+    '3rOsWG5cB1NaU2xoGxICJpsYhEGC7ArddNfP0EWzKLRZFCG6aaGbfIRAoauEfoNIS2ed2NRO'
+    '/xCISQKJLRLLzps3c7uQLEuxQqtIq9YHBh7D3JkzZ86998EpTnGKU/zfIZPYpFarmUajYf5p'
+    'XbVajfV6Pf53FKjVaqZer8dKpVJ1zlVDCFFVTyghItFaa/I8bzSbzcZR3MgEarXawObr6+vJ'
+    '6uqqbzabPxaLxa+zLEPk5JaqSpqmtNvtnyqVyjdHcRPzQKVS+TZN0++99znghizJkyRxWZZ9'
+    '12w2fxj1CQTQcrlcStP0Z6AEaHdeut9LIrKsqt35/m0VQEVEVPVP4K++uKFshyLGmACfJkni'
+    'YownJI4xghhRBBM9qIII0SQIKqoRY8yyiCz3x/5rAs45Bfa893OdM1WOTYaoOGPzA0zIyKbn'
+    'iTbBBE968IxoU4KbJsY8qnZuPjKBLqyIWFVV6XObiiHJWrw8+zEPL37B8/euEFwBmx/y7uO7'
+    'fLjxCzN72/h01giD6rlxDahicNlLHn30OVtXviJMFSHvvLCfeoed85/xZOkqn9y9wfsPfiVP'
+    'ZxA9JmHGPjxv01pYYbN8nWCLyGGAqB0PREUOA8EW2Sxfp7WwgsvbqJjJEOg6kAcrX4IBCQE1'
+    'ti9BBDUWCQEMnXU6YIFxCBhsfsCL+Qu0Fi4hXlGxb1DKIl5pLVzixfwFbH7QO9q8vfwgMedV'
+    '4Rzq7ImbDVNKneVV4RwSc45yyIzbSkz0o+kW/UD9e2sCokp0BWZ2t0j291DbK27Dro9aIdnf'
+    'Y2Z3i+gKSFexMRRQokkotJ+yuH0bEsHE/A23ziERFrdvU2g/JZqkR3asJxAN+LTE0v2bzO5s'
+    'EItJb/5oAMRiwuzOBkv3b+LTUm9+MmmIgCqX71xj8d4tDB6dsr1h8Czeu8XlO9e6RpWRf0gE'
+    '0LW1tTnn3O8iMnfc9fqaQQydtJw7z7MPVsnTM7hsn/lH65R2fyO46U6NeC1bHJOAdmqAT0uc'
+    'af1B6fkmgqII0U51ZdehqToZAl1TiirBFQhuuq/j60Dtfx1/AyBGawaBsqSUAAAAAElFTkSu'
+    'QmCC'
+)
 
 def create_icon():
     """Create a system tray icon with a camera design."""
-    # Create a transparent background
-    icon_size = 128  # Increased from 64 to 128 for better scaling
-    icon_image = Image.new("RGBA", (icon_size, icon_size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(icon_image)
-    
-    # Scale factor to make the camera design larger
-    scale = 1.4
-    
-    # Draw camera body (dark gray with slight transparency)
-    camera_body = [
-        (32*scale, 44*scale),  # top-left
-        (96*scale, 44*scale),  # top-right
-        (96*scale, 92*scale),  # bottom-right
-        (32*scale, 92*scale)   # bottom-left
-    ]
-    draw.polygon(camera_body, fill=(64, 64, 64, 255))  # Made fully opaque
-    
-    # Draw camera lens (light blue with slight transparency)
-    center_x, center_y = 64*scale, 68*scale
-    radius = 16*scale
-    draw.ellipse(
-        [center_x - radius, center_y - radius, 
-         center_x + radius, center_y + radius],
-        fill=(0, 150, 255, 255)  # Made fully opaque
-    )
-    
-    # Draw viewfinder bump (dark gray with slight transparency)
-    viewfinder = [
-        (50*scale, 36*scale),  # top-left
-        (78*scale, 36*scale),  # top-right
-        (78*scale, 44*scale),  # bottom-right
-        (50*scale, 44*scale)   # bottom-left
-    ]
-    draw.polygon(viewfinder, fill=(64, 64, 64, 255))  # Made fully opaque
-    
-    # Resize the image down to Windows system tray size (16x16 or 32x32)
-    icon_image = icon_image.resize((32, 32), Image.Resampling.LANCZOS)
-    
+    icon_image = Image.open(io.BytesIO(base64.b64decode(_ICON_PNG_B64)))
+    icon_image.load()
     return icon_image
 
 def quit_program(icon, item):
     """Quit the program."""
     print("Exiting...")
     icon.stop()
+    flush_settings()  # os._exit skips atexit handlers
     os._exit(0)
 
 def notify(title, message):
@@ -964,30 +1124,45 @@ def notify(title, message):
         timeout=5
     )
 
-def get_sun_times():
-    """Calculate today's sunrise and sunset times for the given location."""
-    s = sun(get_location_info().observer, date=datetime.now(ZoneInfo(get_location_info().timezone)))
-    return s['sunrise'], s['sunset']
+# Characters invalid in Windows filenames, plus anything non-ASCII
+_FN_INVALID = re.compile(r'[<>:"/\\|?*\x80-\U0010ffff]+')
+# Runs of whitespace and underscores
+_FN_SEPARATORS = re.compile(r'[\s_]+')
 
 def clean_filename(filename):
     """Clean a string to be used as a filename."""
-    # Remove invalid characters
-    cleaned = re.sub(r'[<>:"/\\|?*]', '', filename)
-    # Replace spaces and multiple underscores with single underscore
-    cleaned = re.sub(r'[\s_]+', '_', cleaned)
-    # Remove any non-ASCII characters
-    cleaned = re.sub(r'[^\x00-\x7F]+', '', cleaned)
-    # Remove leading/trailing underscores and dots
-    cleaned = cleaned.strip('_.')
-    # Limit length to avoid too long filenames
-    return cleaned[:100]
+    # Drop invalid and non-ASCII characters, collapse separators to a single underscore,
+    # trim leading/trailing underscores and dots, and limit the length
+    return _FN_SEPARATORS.sub('_', _FN_INVALID.sub('', filename)).strip('_.')[:100]
+
+def _has_location():
+    """Whether settings already hold real coordinates."""
+    return settings['location']['latitude'] != 0 or settings['location']['longitude'] != 0
+
+def _resolve_location_async():
+    """Resolve the Windows/IP location off the startup path and store it if none is set."""
+    logging.info("Getting initial location...")
+    windows_location = get_windows_location()
+    logging.info(f"Windows location result: {windows_location}")
+    if windows_location and not _has_location():
+        settings['location'] = windows_location
+        _invalidate_location_cache()
+        save_settings()
+        _schedule_wakeup.set()  # Recompute the schedule for the new location
 
 def run_app():
     """Run the application with system tray icon."""
     logging.info("Starting application")
     icon_image = create_icon()
     icon = Icon("Screenshot Grabber", icon_image)  # Create icon without menu first
-    icon.menu = create_menu(icon)  # Set menu once with proper icon reference
+    icon.menu = create_menu()  # Built once; callbacks refresh it with update_menu()
+    
+    # Created once here and in select_output_path rather than on every capture
+    os.makedirs(settings['output_path'], exist_ok=True)
+    
+    logging.info("Starting screenshot writer thread...")
+    writer_thread = threading.Thread(target=_frame_writer, daemon=True)
+    writer_thread.start()
     
     logging.info("Starting screenshot thread...")
     screenshot_thread = threading.Thread(target=test_screenshots, daemon=True)
@@ -1000,10 +1175,9 @@ def run_app():
     
     logging.info("Application ready")
     
-    # Initialize settings
-    if windows_location:
-        settings['location'] = windows_location
-        save_settings()
+    # Look up the location in the background unless config.json already has one
+    if not _has_location():
+        threading.Thread(target=_resolve_location_async, daemon=True).start()
     
     try:
         # Start the schedule thread if needed
@@ -1017,12 +1191,13 @@ def run_app():
         raise
     finally:
         # Clean up any remaining customtkinter windows
-        for window in ctk.CTk.get_instances():
-            try:
-                window.quit()
-                window.destroy()
-            except Exception:
-                pass
+        if _ctk is not None:
+            for window in _ctk.CTk.get_instances():
+                try:
+                    window.quit()
+                    window.destroy()
+                except Exception:
+                    pass
 
 if __name__ == "__main__":
     try:
@@ -1,40 +1,70 @@
 import os
 import logging
-import threading
-import concurrent.futures
-import queue
 from datetime import datetime
 from pathlib import Path
-import yt_dlp
 from typing import Dict, Any, List, Optional
 import sys
+import shutil
 import subprocess
+import threading
+import concurrent.futures
 
-# Add the project root to the Python path
-project_root = str(Path(__file__).parent.parent)
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+# Add the project root to the Python path when run as a script (python src/main.py);
+# run as a module (python -m src.main) or frozen, the package is already importable
+if not __package__:
+    project_root = str(Path(__file__).parent.parent)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
 
-from src.utils.logging_config import setup_logging
+from src.utils.logging_config import setup_logging, stop_logging
+from src.utils.process_utils import HIDDEN_STARTUPINFO, NO_WINDOW_FLAGS
 from src.core.settings import Settings
 from src.core.location import get_windows_location, get_location_info
 from src.core.screenshot import ScreenshotCapture, StreamManager
 from src.core.scheduler import Scheduler
-from src.gui.system_tray import SystemTray
+from src.gui.system_tray import SystemTray, ENCODE_THREADS, SOFTWARE_ENCODER_ARGS
+from src.gui.url_dialog import is_youtube_url
 
 # Initialize logging first
 setup_logging()
 logger = logging.getLogger('src.core.scheduler')
 
+# Seconds to wait for further location changes before rebuilding the scheduler
+SCHEDULER_UPDATE_DELAY = 0.25
+
+# Fixed parts of the clip encode command; only the frame rate, input and output vary
+_CLIP_INPUT_ARGS = (
+    "ffmpeg",
+    "-f", "concat",
+    "-safe", "0",
+    "-protocol_whitelist", "file,pipe",  # The list comes from a pipe, the frames from files
+)
+_CLIP_OUTPUT_ARGS = (
+    *SOFTWARE_ENCODER_ARGS,
+    "-pix_fmt", "yuv420p",
+    "-threads", str(ENCODE_THREADS),  # Leave cores for the other encodes
+    "-y",
+)
+
 class App:
     def __init__(self):
         """Initialize the application."""
         self.settings = Settings()
         self.screenshot = ScreenshotCapture()
-        self.stream_manager = StreamManager()
+        self.stream_manager = StreamManager(self.screenshot)
         self.scheduler = Scheduler(settings=self.settings)
-        self.scheduler._app = self
-        self._validation_thread = None
+        self.scheduler.set_app(self)
+        # Runs slow stream/scheduler restarts off the GUI callbacks; one worker keeps them in order
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix='app-restart'
+        )
+        # quit() can be reached twice (tray menu, then run()'s finally); only the first runs
+        self._closing = False
+        self._quit_lock = threading.Lock()
+        # Pending debounced scheduler rebuild scheduled by set_location
+        self._scheduler_update: Optional[threading.Timer] = None
+        self._scheduler_update_lock = threading.Lock()
         
         # Only use Windows location if no location is saved
         saved_location = self.settings.get('location', {})
@@ -51,6 +81,7 @@ class App:
             settings=self.settings.all,
             callbacks={
                 'set_youtube_url': self.set_youtube_urls,
+                'url_validated': self.prefetch_url,
                 'set_location': self.set_location,
                 'set_interval': self.set_interval,
                 'set_resolution': self.set_resolution,
@@ -60,7 +91,7 @@ class App:
                 'toggle_capture_mode': self.toggle_capture_mode,
                 'toggle_pause': self.toggle_pause,
                 'quit': self.quit,
-                'get_current_settings': lambda: self.settings.all,
+                'get_current_settings': lambda: self.settings.view,
                 'toggle_shutdown_when_done': self.toggle_shutdown_when_done
             }
         )
@@ -69,28 +100,61 @@ class App:
         if self.settings.get('youtube_urls'):
             self.start_screenshot_thread()
     
-    def set_youtube_urls(self, urls: List[str], valid_urls: List[str] = None) -> None:
-        # We don't bother with the concurrency validation
+    def _run_in_background(self, fn) -> None:
+        """Queue fn on the restart worker, logging any error it raises."""
+        def log_error(future: concurrent.futures.Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                logger.error(f"Error in {fn.__name__}: {future.exception()}")
+        self._executor.submit(fn).add_done_callback(log_error)
+
+    def prefetch_url(self, url: str) -> None:
+        """Start resolving a freshly validated URL while the rest are still being checked."""
+        self.screenshot.prefetch_stream_info([url], self.settings.get('resolution', '1080p'))
+
+    def set_youtube_urls(self, urls: List[str], invalid_urls: Optional[List[str]] = None) -> None:
+        """Save and capture the URLs that passed the dialog's validation.
+
+        invalid_urls, the entered URLs that failed validation, are not saved.
+        """
+        if invalid_urls:
+            logger.warning(f"Ignoring {len(invalid_urls)} URL(s) that failed validation")
+        unchanged = set(urls) == set(self.settings.get('youtube_urls', []))
         self.settings.set('youtube_urls', urls)
+        if unchanged:
+            # Same streams: keep the scheduler and running captures as they are
+            logger.info("YouTube URLs unchanged, not restarting captures")
+            return
+        # Stopping streams joins their threads, so let the dialog return right away
+        self._run_in_background(self._restart_captures)
+
+    def _restart_captures(self) -> None:
+        """Stop every stream and start capturing again with the current URLs."""
         self.stream_manager.stop_all()
         # Start them again
         self.start_screenshot_thread()
 
     
-    def _is_valid_youtube_url(self, url: str) -> bool:
-        """Check if the URL is a valid YouTube URL."""
-        youtube_domains = ['youtube.com', 'youtu.be', 'www.youtube.com']
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            return any(domain in parsed.netloc for domain in youtube_domains)
-        except:
-            return False
+    _is_valid_youtube_url = staticmethod(is_youtube_url)
     
     def set_location(self, location: Dict[str, float]) -> None:
         """Set location and update scheduler."""
         self.settings.set('location', location)
-        self.update_scheduler()
+        self._schedule_scheduler_update()
+
+    def _schedule_scheduler_update(self) -> None:
+        """Coalesce bursts of changes into a single scheduler rebuild."""
+        with self._scheduler_update_lock:
+            if self._scheduler_update is not None:
+                self._scheduler_update.cancel()
+            self._scheduler_update = threading.Timer(SCHEDULER_UPDATE_DELAY, self._flush_scheduler_update)
+            self._scheduler_update.daemon = True
+            self._scheduler_update.start()
+
+    def _flush_scheduler_update(self) -> None:
+        """Rebuild the scheduler once changes have settled."""
+        with self._scheduler_update_lock:
+            self._scheduler_update = None
+        self._run_in_background(self.update_scheduler)
     
     def set_interval(self, interval: int) -> None:
         """Set capture interval in seconds."""
@@ -100,12 +164,12 @@ class App:
         self.scheduler.update_settings(interval=interval)
         # Update interval for all running streams
         self.stream_manager.update_interval(interval)
-        self.system_tray.update_settings(self.settings.all)
+        self.system_tray.update_settings({'interval': interval})
     
     def set_resolution(self, resolution: str) -> None:
         """Set preferred resolution."""
         self.settings.set('resolution', resolution)
-        self.system_tray.update_settings(self.settings.all)
+        self.system_tray.update_settings({'resolution': resolution})
         logger.info("Scheduler settings updated")
     
     def set_time_window(self, minutes: int) -> None:
@@ -114,18 +178,20 @@ class App:
         minutes = int(minutes)
         self.settings.set('time_window', minutes)
         self.scheduler.update_settings(time_window=minutes)
-        self.system_tray.update_settings(self.settings.all)
+        self.system_tray.update_settings({'time_window': minutes})
     
     def set_output_path(self, path: str) -> None:
         """Set output path for screenshots."""
         self.settings.set('output_path', path)
+        # Convert to Clips reads output_path from the tray's own copy
+        self.system_tray.update_settings({'output_path': path})
     
     def toggle_schedule(self) -> None:
         """Toggle schedule enabled state."""
         enabled = not self.settings.get('schedule_enabled', False)
         self.settings.set('schedule_enabled', enabled)
         self.scheduler.update_settings(schedule_enabled=enabled)
-        self.system_tray.update_settings(self.settings.all)
+        self.system_tray.update_settings({'schedule_enabled': enabled})
 
     def toggle_capture_mode(self, mode: str) -> None:
         """Toggle between different capture modes (both, sunrise, sunset)."""
@@ -139,11 +205,13 @@ class App:
             self.settings.set('only_sunsets', True)
             self.settings.set('only_sunrises', False)
             
-        self.scheduler.update_settings(
-            only_sunsets=self.settings.get('only_sunsets', False),
-            only_sunrises=self.settings.get('only_sunrises', False)
-        )
-        self.system_tray.update_settings(self.settings.all)
+        # Only the two mode flags changed, so the tray gets just those
+        changed = {
+            'only_sunsets': self.settings.get('only_sunsets', False),
+            'only_sunrises': self.settings.get('only_sunrises', False)
+        }
+        self.scheduler.update_settings(**changed)
+        self.system_tray.update_settings(changed)
 
     def toggle_pause(self) -> None:
         """Toggle pause state."""
@@ -151,25 +219,54 @@ class App:
             # Currently paused: resume the scheduler and all stream processes.
             self.scheduler.resume()
             self.system_tray.set_paused(False)
-            for stream in self.stream_manager.streams.values():
+            for stream in self.stream_manager.snapshot():
                 stream.resume()
         else:
             # Currently running: pause the scheduler and all stream processes.
             self.scheduler.pause()
             self.system_tray.set_paused(True)
-            for stream in self.stream_manager.streams.values():
+            for stream in self.stream_manager.snapshot():
                 stream.pause()
-        self.system_tray.update_settings(self.settings.all)
     
     def quit(self) -> None:
-        """Quit the application."""
+        """Quit the application; calls after the first return immediately."""
+        with self._quit_lock:
+            if self._closing:
+                return
+            self._closing = True
         logger.info("Quitting application...")
 
-        # 1. Stop scheduler
+        # 1. Drop queued restarts so nothing starts streams again while shutting down
+        with self._scheduler_update_lock:
+            if self._scheduler_update is not None:
+                self._scheduler_update.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        # 2. Stop scheduler
         self.scheduler.stop()
         
-        # 2. Stop all stream processes
+        # 3. Stop all stream processes, then make sure none of their ffmpeg children outlive us
+        pipes = list(self.stream_manager.iter_processes())
         self.stream_manager.stop_all()
+        for pipe in pipes:
+            if pipe.poll() is None:
+                pipe.terminate()
+            try:
+                pipe.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                pipe.kill()
+
+        # 4. Drop any pending stream info prefetches
+        self.screenshot.shutdown()
+
+        # 5. Write any pending settings changes before the hard exit
+        self.settings.flush()
+
+        # 6. Remove the tray icon so it isn't left behind after the hard exit
+        self.system_tray.stop()
+
+        # 7. Write out queued log records; os._exit skips atexit handlers
+        stop_logging()
         
         os._exit(0)  # Hard kill
     
@@ -206,32 +303,34 @@ class App:
     
     def capture_screenshot(self, event_type="") -> Optional[str]:
         try:
-            urls = self.settings.get('youtube_urls', [])
+            # One lookup of the settings for every value this tick needs
+            settings = self.settings.view
+            urls = settings.get('youtube_urls', [])
             if not urls:
                 logger.warning("No YouTube URLs set")
                 return
 
-            output_path = self.settings.get('output_path')
+            output_path = settings.get('output_path')
             if not output_path:
                 logger.warning("No output path set")
                 return
 
-            interval = int(self.settings.get('interval', 60))
-            resolution = self.settings.get('resolution', '1080p')
+            interval = int(settings.get('interval', 60))
+            resolution = settings.get('resolution', '1080p')
 
-            # Remove old streams if needed, then add streams for new URLs
-            current_urls = set(self.stream_manager.streams.keys())
-            new_urls = set(urls)
+            # Remove old streams if needed, then add streams for new URLs;
+            # dict keys keep the user's order so streams start in that order
+            current_urls = {stream.url for stream in self.stream_manager.snapshot()}
+            new_urls = dict.fromkeys(urls)
 
             # Remove any that aren't used
-            for url in current_urls - new_urls:
-                self.stream_manager.remove_stream(url)
+            self.stream_manager.remove_streams(current_urls - new_urls.keys())
 
             # Whether everything is paused
             is_paused = self.scheduler._paused
 
             # Add new streams (with event_type so we can name folders properly)
-            for url in new_urls - current_urls:
+            for url in (u for u in new_urls if u not in current_urls):
                 self.stream_manager.add_stream(
                     url=url,
                     output_path=output_path,
@@ -258,7 +357,7 @@ class App:
         """Toggle whether the PC should shut down automatically after converting clips."""
         current = bool(self.settings.get('shutdown_when_done', False))
         self.settings.set('shutdown_when_done', not current)
-        self.system_tray.update_settings(self.settings.all)
+        self.system_tray.update_settings({'shutdown_when_done': not current})
 
     def convert_subfolders_to_clips_and_cleanup(self, event_type: str = "") -> None:
         """
@@ -276,99 +375,106 @@ class App:
         # We'll match subfolders that start with e.g. "2025_02_07_Sunrise_" or "2025_02_07_"
         # If event_type is empty => any subfolder matching today's date
 
+        # If we have "Sunrise" or "Sunset", folders must also contain e.g. "_Sunset_"
+        event_tag = f"_{event_type.capitalize()}_" if event_type else ""
+        prefix_len = len(today_str)
+
+        # One directory scan: DirEntry caches the file type, so no extra stat per entry
         try:
-            subfolders = [
-                f for f in os.listdir(output_path)
-                if os.path.isdir(os.path.join(output_path, f))
-            ]
+            with os.scandir(output_path) as entries:
+                matched_subfolders = [
+                    e.name for e in entries
+                    if e.is_dir(follow_symlinks=False)
+                    and e.name.startswith(today_str)
+                    # The tag follows the date, so search only past the prefix
+                    and e.name.find(event_tag, prefix_len) != -1
+                ]
         except Exception as ex:
             logger.error(f"Error listing subfolders in {output_path}: {ex}")
             return
 
-        # Filter down to those that match the pattern
-        matched_subfolders = []
-        for folder in subfolders:
-            if folder.startswith(today_str):
-                if event_type:
-                    # If we have "Sunrise" or "Sunset", check it
-                    # e.g. "2025_02_07_Sunset_..."
-                    if f"_{event_type.capitalize()}_" in folder:
-                        matched_subfolders.append(folder)
-                else:
-                    # If event_type is "", we accept everything that starts with today's date
-                    matched_subfolders.append(folder)
-
         if not matched_subfolders:
             logger.info(f"No subfolders match {today_str} {event_type}, skipping conversion.")
             return
 
         logger.info(f"Converting subfolders for {today_str} {event_type}: {matched_subfolders}")
 
-        # We'll adapt the conversion logic from SystemTray._convert_subfolders_to_clips_ffmpeg,
-        # but do it here synchronously
         fps = self.settings.get('fps', 60)
-
-        for folder_name in matched_subfolders:
-            folder_path = os.path.join(output_path, folder_name)
-            image_files = [
-                f for f in os.listdir(folder_path)
-                if f.lower().endswith(".jpg")
-            ]
-            if not image_files:
-                logger.info(f"No images found in {folder_name}, skipping.")
-                continue
-
-            # Sort them
-            image_files.sort()
-
-            logger.info(f"Renaming {len(image_files)} images in '{folder_name}' for FFmpeg sequence.")
-            # rename to frame0001.jpg, frame0002.jpg, etc.
-            for i, old_filename in enumerate(image_files, start=1):
-                new_filename = f"frame{i:04d}.jpg"
-                old_path = os.path.join(folder_path, old_filename)
-                new_path = os.path.join(folder_path, new_filename)
+        # Each encode is an FFmpeg child process, so threads are enough to run them side by side
+        workers = max(1, (os.cpu_count() or 1) // ENCODE_THREADS)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(workers, len(matched_subfolders)),
+            thread_name_prefix='clip-encode'
+        ) as executor:
+            futures = {
+                executor.submit(self._convert_one_folder, folder_name, output_path, fps): folder_name
+                for folder_name in matched_subfolders
+            }
+            for future in concurrent.futures.as_completed(futures):
                 try:
-                    os.rename(old_path, new_path)
-                except Exception as e:
-                    logger.error(f"Could not rename {old_filename} -> {new_filename}: {e}")
-
-            # The final clip name can just be the folder name (plus .mp4):
-            output_clip = os.path.join(output_path, f"{folder_name}.mp4")
-            logger.info(f"Converting images in '{folder_name}' to '{output_clip}' at {fps} FPS")
-
-            cmd = [
-                "ffmpeg",
-                "-framerate", str(fps),
-                "-i", os.path.join(folder_path, "frame%04d.jpg"),
-                "-c:v", "libx264",
-                "-pix_fmt", "yuv420p",
-                "-y",
-                output_clip
-            ]
-
-            process = subprocess.run(cmd, capture_output=True, text=True)
-            if process.returncode != 0:
-                logger.error(f"FFmpeg error for '{folder_name}':\n{process.stderr}")
-                continue
-
-            logger.info(f"Clip created: {output_clip}. Deleting images and folder...")
-
-            # remove all .jpg
-            for img_file in os.listdir(folder_path):
-                if img_file.lower().endswith(".jpg"):
-                    try:
-                        os.remove(os.path.join(folder_path, img_file))
-                    except Exception as ex:
-                        logger.warning(f"Could not delete file {img_file}: {ex}")
-
-            # remove the folder
-            try:
-                os.rmdir(folder_path)
-            except Exception as ex:
-                logger.warning(f"Could not remove folder {folder_path}: {ex}")
+                    future.result()
+                except Exception as ex:
+                    logger.error(f"Clip conversion error for '{futures[future]}': {ex}")
 
         logger.info("All matching subfolders converted and cleaned up.")
 
+    def _convert_one_folder(self, folder_name: str, output_path: str, fps: int) -> None:
+        """Encode one subfolder's images to '<folder>.mp4' in output_path, then delete the folder."""
+        folder_path = os.path.join(output_path, folder_name)
+        # Sorted so the video sequence matches the timestamped names
+        image_files = sorted(
+            f for f in os.listdir(folder_path)
+            if f.lower().endswith(".jpg")
+        )
+        if not image_files:
+            logger.debug(f"No images found in {folder_name}, skipping.")
+            return
+
+        # List the frames for the concat demuxer and pipe it to FFmpeg, so the images
+        # are read in place instead of being linked or renamed to a numeric pattern
+        # The folder part is joined and escaped once rather than per image
+        prefix = os.path.join(folder_path, '').replace("'", "'\\''")
+        concat_list = ''.join(
+            "file '{}{}'\n".format(prefix, name.replace("'", "'\\''"))
+            for name in image_files
+        )
+
+        # The final clip name can just be the folder name (plus .mp4):
+        output_clip = os.path.join(output_path, f"{folder_name}.mp4")
+        logger.debug(f"Converting images in '{folder_name}' to '{output_clip}' at {fps} FPS")
+
+        cmd = [
+            *_CLIP_INPUT_ARGS,
+            "-r", str(fps),  # One image per frame
+            "-i", "pipe:0",
+            *_CLIP_OUTPUT_ARGS,
+            output_clip
+        ]
+
+        # Only stderr is kept for error reporting; FFmpeg's stdout is discarded
+        process = subprocess.run(
+            cmd,
+            input=concat_list,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            encoding='utf-8',  # FFmpeg reads and prints paths as UTF-8
+            errors='replace',
+            startupinfo=HIDDEN_STARTUPINFO,
+            creationflags=NO_WINDOW_FLAGS
+        )
+        if process.returncode != 0:
+            logger.error(f"FFmpeg error for '{folder_name}':\n{process.stderr}")
+            return
+
+        logger.debug(f"Clip created: {output_clip}. Deleting images and folder...")
+
+        # The folder only holds the captured images, so remove it in one go
+        try:
+            shutil.rmtree(folder_path)
+        except OSError as ex:
+            logger.warning(f"Could not remove folder {folder_path}: {ex}")
+
 def main():
     """Main entry point."""
     try:
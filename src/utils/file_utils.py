@@ -1,28 +1,22 @@
 import os
+import re
 import logging
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Characters not allowed in Windows filenames, plus spaces, all mapped to '_'
+_FILENAME_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?* '})
+_UNDERSCORE_RUNS = re.compile(r'_{2,}')
+
 def clean_filename(filename: str) -> str:
     """Clean a string to be used as a filename."""
-    # Replace invalid characters
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-    
-    # Replace spaces with underscores
-    filename = filename.replace(' ', '_')
-    
-    # Remove any double underscores
-    while '__' in filename:
-        filename = filename.replace('__', '_')
+    # Replace invalid characters and spaces with underscores in one pass,
+    # then collapse runs of underscores
+    filename = _UNDERSCORE_RUNS.sub('_', filename.translate(_FILENAME_TRANS))
     
-    # Remove leading/trailing underscores and dots
-    filename = filename.strip('_.')
-    
-    # Limit length
-    return filename[:100]
+    # Remove leading/trailing underscores and dots, and limit length
+    return filename.strip('_.')[:100]
 
 def ensure_dir_exists(path: str) -> None:
     """Create directory if it doesn't exist."""
@@ -39,13 +33,19 @@ def get_unique_filename(path: str, base_name: str, ext: str = '') -> str:
     elif ext and not ext.startswith('.'):
         ext = '.' + ext
         
+    # Read the directory once and probe names against it instead of a stat per candidate;
+    # normcase matches the filesystem's case-insensitivity on Windows
+    try:
+        with os.scandir(path) as entries:
+            existing = {os.path.normcase(e.name) for e in entries}
+    except FileNotFoundError:
+        existing = set()
+        
     counter = 1
     filename = f"{base_name}{ext}"
-    full_path = os.path.join(path, filename)
     
-    while os.path.exists(full_path):
+    while os.path.normcase(filename) in existing:
         filename = f"{base_name}_{counter}{ext}"
-        full_path = os.path.join(path, filename)
         counter += 1
         
     return filename
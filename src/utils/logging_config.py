@@ -1,16 +1,48 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+from typing import Optional
+
+# Writes queued log records to stdout on its own thread
+_listener: Optional[logging.handlers.QueueListener] = None
 
 def setup_logging():
     """Configure logging for the application."""
+    global _listener
     # Suppress PIL debug logging
     logging.getLogger('PIL').setLevel(logging.INFO)
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+
+    # YTSG_LOGLEVEL (e.g. DEBUG or WARNING) overrides the default INFO level
+    level = os.environ.get('YTSG_LOGLEVEL', 'INFO').upper()
+    if not isinstance(logging.getLevelName(level), int):
+        level = 'INFO'
+
+    if _listener is None:
+        # Logging threads only enqueue records; the stdout write happens on the listener thread
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(
+            logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+        )
+        log_queue = queue.Queue(-1)
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+        # The queue handler only merges args into the message; the stream handler adds the layout
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        logging.basicConfig(
+            level=level,
+            handlers=[queue_handler]
+        )
     return logging.getLogger(__name__)
+
+def stop_logging() -> None:
+    """Write out any queued log records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,13 @@
+import os
+import subprocess
+
+# Options that keep console windows of child processes (ffmpeg, powershell)
+# hidden on Windows. Built once at import and passed to every subprocess call.
+if os.name == 'nt':
+    HIDDEN_STARTUPINFO = subprocess.STARTUPINFO()
+    HIDDEN_STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    HIDDEN_STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+    NO_WINDOW_FLAGS = subprocess.CREATE_NO_WINDOW
+else:
+    HIDDEN_STARTUPINFO = None
+    NO_WINDOW_FLAGS = 0